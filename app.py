@@ -31,8 +31,8 @@ with st.sidebar:
     st.image("assets/ketos_logo.png", width=200)
     
     # Simple navigation with radio buttons
-    pages = ["Job Setup", "Resume Upload", "Screening Dashboard", "NLP Insights", "User Management"]
-    icons = ["📋", "📤", "📊", "🧠", "👥"]
+    pages = ["Job Setup", "Resume Upload", "Screening Dashboard", "NLP Insights", "Semantic Search", "User Management"]
+    icons = ["📋", "📤", "📊", "🧠", "🔎", "👥"]
     
     st.markdown("## Navigation")
     
@@ -57,6 +57,9 @@ elif st.session_state.page == "Screening Dashboard":
 elif st.session_state.page == "NLP Insights":
     from pages.nlp_insights import show_nlp_insights
     show_nlp_insights(username)
+elif st.session_state.page == "Semantic Search":
+    from pages.semantic_search import show_semantic_search
+    show_semantic_search(username)
 elif st.session_state.page == "User Management":
     from pages.user_management import show_user_management
     show_user_management(username)
@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from utils.db import get_jobs, get_candidates, update_candidate_status
+from utils.db import get_jobs, get_candidates, update_candidate_status, get_candidate_skills, get_candidate_ids_with_skills
 import base64
 
 def get_download_link(file_path, link_text):
@@ -71,6 +71,14 @@ def show_dashboard(username):
         show_passed_only = st.checkbox("Show Passed Candidates Only", value=True)
         candidates = get_candidates(job_id, passed_only=show_passed_only)
         
+        # Filter by the taxonomy skills stored for each candidate
+        skill_options = sorted(get_candidate_skills(job_id)['skill'].unique())
+        if skill_options:
+            required_skills = st.multiselect("Filter by skills", skill_options)
+            if required_skills:
+                candidate_ids = get_candidate_ids_with_skills(job_id, required_skills)
+                candidates = candidates[candidates['id'].isin(candidate_ids)]
+        
         if candidates.empty:
             st.info("No candidates found for this job.")
             return
@@ -81,6 +89,11 @@ def show_dashboard(username):
         display_data['passed'] = display_data['passed'].apply(lambda x: "Pass" if x else "Fail")
         display_data['advanced'] = display_data['advanced'].apply(lambda x: "Yes" if x else "No")
         
+        # Show which screening stage decided each candidate
+        display_data['stage'] = candidates['screening_stage'].apply(
+            lambda x: "Prefilter" if x == "prefilter" else "Full"
+        )
+        
         # Add resume link column
         display_data['resume'] = candidates['resume_path'].apply(
             lambda x: "Download" if x else ""
@@ -1,5 +1,6 @@
 import streamlit as st
 from utils.db import save_job, save_criteria, get_jobs, get_job, get_criteria
+from utils.nlp import cache_job_embeddings, invalidate_criteria_matchers
 import pandas as pd
 import re
 
@@ -103,6 +104,14 @@ def show_job_setup(username):
                 # Save criteria
                 save_criteria(job_id, st.session_state['extracted_criteria'])
                 
+                # Recompile criteria matchers and embed the description and
+                # criteria now so screening can reuse them
+                invalidate_criteria_matchers()
+                try:
+                    cache_job_embeddings(job_description, [c['text'] for c in st.session_state['extracted_criteria']])
+                except Exception as e:
+                    print(f"Error caching job embeddings: {e}")
+                
                 st.success(f"Job '{job_title}' saved successfully!")
                 
                 # Clear session state
@@ -1,9 +1,117 @@
 import streamlit as st
 import pandas as pd
 import os
-from utils.db import get_jobs, get_job, get_criteria, save_candidate
-from utils.parser import parse_resume, save_uploaded_file
-from utils.screening import screen_candidate
+import zipfile
+from utils.db import get_jobs, get_job, get_criteria, save_candidate, get_candidate_blob_ids, save_quarantine, get_quarantine
+from utils.blobstore import blob_id_from_path
+from utils.parser import save_uploaded_file
+from utils.screening import SCREENING_STAGE_PREFILTER
+from utils.ingestion import (
+    DEFAULT_WORKERS,
+    process_resumes_batch,
+    process_resumes_parallel,
+    iter_archive_members,
+    iter_directory_files,
+    count_supported,
+    new_ingestion_stats,
+    stream_into_store,
+    format_throughput
+)
+
+def _announce_files(files, status_text):
+    """Show each file's name as it is picked up for parsing."""
+    for name, file_path in files:
+        status_text.text(f"Processing {name}...")
+        yield name, file_path
+
+def _run_screening(job_id, job, criteria, files, total, parallel, max_workers, sandbox, cascade, stats=None):
+    """Parse, screen and save resumes, showing results as each file finishes."""
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    results_table = st.empty()
+    
+    results = []
+    errors = []
+    quarantined = 0
+    prefiltered = 0
+    
+    if parallel:
+        status_text.text(f"Processing {total} resumes with {max_workers} workers...")
+        outcomes = process_resumes_parallel(files, criteria, job['description'], max_workers=int(max_workers), sandbox=sandbox, cascade=cascade)
+    else:
+        # Parse on the script thread and screen the parsed resumes in batches
+        outcomes = process_resumes_batch(_announce_files(files, status_text), criteria, job['description'], sandbox=sandbox, cascade=cascade)
+    
+    for i, outcome in enumerate(outcomes):
+        if outcome['error']:
+            errors.append(f"{outcome['file']}: {outcome['error']}")
+        elif outcome['result'] and outcome['result']['incident']:
+            # Record files that hit the parser's time or memory limits
+            incident = outcome['result']['incident']
+            save_quarantine(job_id, outcome['file'], outcome['file_path'], blob_id_from_path(outcome['file_path']), incident)
+            quarantined += 1
+            if not incident['recovered']:
+                errors.append(f"{outcome['file']}: quarantined ({incident['reason']})")
+        
+        if not outcome['error'] and outcome['result'] and outcome['result']['parsed']:
+            parsed_data = outcome['result']['parsed']
+            screening_result = outcome['result']['screening']
+            
+            # Save candidate to database
+            candidate_id = save_candidate(job_id, outcome['result']['candidate'])
+            if screening_result.get('screening_stage') == SCREENING_STAGE_PREFILTER:
+                prefiltered += 1
+            
+            # Add to results
+            results.append({
+                'File': outcome['file'],
+                'Name': parsed_data['name'],
+                'Email': parsed_data['email'],
+                'Score': f"{screening_result['score']:.1f}%",
+                'Status': "Pass" if screening_result['passed'] else "Fail",
+                'Summary': screening_result['summary']
+            })
+            
+            # Show results as each file finishes
+            results_table.dataframe(pd.DataFrame(results))
+        
+        # Update progress
+        progress_bar.progress(min((i + 1) / max(total, 1), 1.0))
+        if stats:
+            status_text.text(format_throughput(stats, i + 1))
+    
+    # Display results
+    progress_bar.progress(1.0)
+    if stats:
+        status_text.text(f"Processing complete! {format_throughput(stats, len(results) + len(errors))}")
+    else:
+        status_text.text("Processing complete!")
+    
+    if prefiltered:
+        st.info(f"{prefiltered} candidate(s) were rejected by the required-criteria prefilter without full analysis.")
+    
+    if quarantined:
+        st.warning(f"{quarantined} file(s) hit the parser's time or memory limits and were quarantined.")
+    
+    if errors:
+        with st.expander(f"{len(errors)} file(s) failed"):
+            for error in errors:
+                st.write(f"• {error}")
+    
+    if results:
+        st.subheader("Processing Results")
+        results_table.empty()
+        results_df = pd.DataFrame(results)
+        st.dataframe(results_df)
+        
+        # Count passes and fails
+        passes = sum(1 for result in results if result['Status'] == "Pass")
+        fails = len(results) - passes
+        
+        st.success(f"Processed {len(results)} resumes: {passes} passed, {fails} failed.")
+        st.info("View the Screening Dashboard to see all candidates and take further actions.")
+    else:
+        st.error("No resumes could be processed. Please check the file formats and try again.")
 
 def show_upload_and_criteria(username):
     st.title("Resume Upload & Screening")
@@ -39,77 +147,99 @@ def show_upload_and_criteria(username):
                 required_text = " (Required)" if criterion['required'] else ""
                 st.write(f"• {criterion['criterion']} - Weight: {criterion['weight']}{required_text}")
         
-        # Upload resumes
-        uploaded_files = st.file_uploader(
-            "Upload Resumes (PDF or DOCX)",
-            type=["pdf", "docx"],
-            accept_multiple_files=True
-        )
+        # Display files that previously hit the parser's limits
+        quarantine = get_quarantine(job_id)
+        if not quarantine.empty:
+            with st.expander(f"Quarantined Files ({len(quarantine)})"):
+                st.dataframe(
+                    quarantine[['file_name', 'reason', 'recovered', 'created_at']],
+                    hide_index=True
+                )
+        
+        # Choose where the resumes come from (server folders are admin only)
+        sources = ["Upload files", "ZIP archive"]
+        if username == "admin":
+            sources.append("Server folder")
+        source = st.radio("Resume source", sources, horizontal=True)
         
-        if uploaded_files:
-            if st.button(f"Process {len(uploaded_files)} Resume(s)"):
-                progress_bar = st.progress(0)
-                status_text = st.empty()
+        # Processing options
+        col1, col2 = st.columns(2)
+        with col1:
+            parallel = st.checkbox(
+                "Parallel processing",
+                value=True,
+                help="Parse and screen resumes across several worker processes."
+            )
+            sandbox = st.checkbox(
+                "Isolate parsing",
+                value=True,
+                help="Parse each file in its own process with time and memory limits."
+            )
+            cascade = st.checkbox(
+                "Cascade screening",
+                value=False,
+                help="Reject candidates missing a required criterion with a quick keyword and lemma check "
+                     "before the full NLP analysis. Faster for jobs with hard requirements, but candidates "
+                     "who meet a requirement only in different words are rejected."
+            )
+        with col2:
+            max_workers = st.number_input(
+                "Worker processes",
+                min_value=1,
+                max_value=os.cpu_count() or 1,
+                value=DEFAULT_WORKERS,
+                disabled=not parallel
+            )
+        
+        if source == "Upload files":
+            # Upload resumes
+            uploaded_files = st.file_uploader(
+                "Upload Resumes (PDF or DOCX)",
+                type=["pdf", "docx"],
+                accept_multiple_files=True
+            )
+            
+            if uploaded_files and st.button(f"Process {len(uploaded_files)} Resume(s)"):
+                # Save the uploaded files, skipping identical copies
+                files = []
+                stored_paths = set()
+                for uploaded_file in uploaded_files:
+                    file_path = save_uploaded_file(uploaded_file)
+                    if file_path not in stored_paths:
+                        stored_paths.add(file_path)
+                        files.append((uploaded_file.name, file_path))
                 
-                results = []
+                if len(files) < len(uploaded_files):
+                    st.info(f"Skipped {len(uploaded_files) - len(files)} duplicate file(s).")
                 
-                for i, uploaded_file in enumerate(uploaded_files):
-                    status_text.text(f"Processing {uploaded_file.name}...")
-                    
-                    # Save the uploaded file
-                    file_path = save_uploaded_file(uploaded_file)
-                    
-                    # Parse the resume
-                    parsed_data = parse_resume(file_path)
-                    
-                    if parsed_data:
-                        # Screen the candidate
-                        screening_result = screen_candidate(parsed_data, criteria, job['description'])
-                        
-                        # Prepare candidate data
-                        candidate_data = {
-                            'name': parsed_data['name'],
-                            'email': parsed_data['email'],
-                            'phone': parsed_data['phone'],
-                            'education': parsed_data['education'],
-                            'experience': parsed_data['experience'],
-                            'skills': parsed_data['skills'],
-                            'resume_path': file_path,
-                            'score': screening_result['score'],
-                            'passed': screening_result['passed'],
-                            'summary': screening_result['summary'],
-                            'nlp_results': screening_result.get('nlp_results', {})
-                        }
-                        
-                        # Save candidate to database
-                        candidate_id = save_candidate(job_id, candidate_data)
-                        
-                        # Add to results
-                        results.append({
-                            'File': uploaded_file.name,
-                            'Name': parsed_data['name'],
-                            'Email': parsed_data['email'],
-                            'Score': f"{screening_result['score']:.1f}%",
-                            'Status': "Pass" if screening_result['passed'] else "Fail",
-                            'Summary': screening_result['summary']
-                        })
-                    
-                    # Update progress
-                    progress_bar.progress((i + 1) / len(uploaded_files))
+                _run_screening(job_id, job, criteria, files, len(files), parallel, max_workers, sandbox, cascade)
+        
+        elif source == "ZIP archive":
+            archive = st.file_uploader("Upload a ZIP archive of resumes", type=["zip"])
+            
+            if archive and st.button("Process Archive"):
+                try:
+                    with zipfile.ZipFile(archive) as zf:
+                        total = count_supported(zf.namelist())
+                except zipfile.BadZipFile:
+                    st.error("The uploaded file is not a valid ZIP archive.")
+                    return
                 
-                # Display results
-                status_text.text("Processing complete!")
+                # Members are streamed from the archive into the resume store
+                archive.seek(0)
+                stats = new_ingestion_stats()
+                files = stream_into_store(iter_archive_members(archive), stats, get_candidate_blob_ids(job_id))
+                _run_screening(job_id, job, criteria, files, total, parallel, max_workers, sandbox, cascade, stats)
+        
+        else:
+            directory = st.text_input("Folder path on the server")
+            
+            if directory and st.button("Process Folder"):
+                if not os.path.isdir(directory):
+                    st.error(f"Folder not found: {directory}")
+                    return
                 
-                if results:
-                    st.subheader("Processing Results")
-                    results_df = pd.DataFrame(results)
-                    st.dataframe(results_df)
-                    
-                    # Count passes and fails
-                    passes = sum(1 for result in results if result['Status'] == "Pass")
-                    fails = len(results) - passes
-                    
-                    st.success(f"Processed {len(results)} resumes: {passes} passed, {fails} failed.")
-                    st.info("View the Screening Dashboard to see all candidates and take further actions.")
-                else:
-                    st.error("No resumes could be processed. Please check the file formats and try again.")
+                total = count_supported(name for _, _, names in os.walk(directory) for name in names)
+                stats = new_ingestion_stats()
+                files = stream_into_store(iter_directory_files(directory), stats, get_candidate_blob_ids(job_id))
+                _run_screening(job_id, job, criteria, files, total, parallel, max_workers, sandbox, cascade, stats)
@@ -0,0 +1,83 @@
+import streamlit as st
+import pandas as pd
+import time
+from utils.db import get_jobs, get_candidates, get_candidates_by_ids
+from utils.vector_index import search_candidates, more_like_this
+
+def show_search_results(hits, elapsed):
+    """Show search hits as a table, best match first."""
+    if not hits:
+        st.info("No candidates with stored embeddings found.")
+        return
+
+    candidates = get_candidates_by_ids([candidate_id for candidate_id, _ in hits]).set_index('id')
+
+    results = []
+    for candidate_id, similarity in hits:
+        if candidate_id not in candidates.index:
+            continue
+        candidate = candidates.loc[candidate_id]
+        results.append({
+            'Name': candidate['name'],
+            'Email': candidate['email'],
+            'Job': candidate['job_title'],
+            'Similarity': f"{similarity * 100:.1f}%",
+            'Score': f"{candidate['score']:.1f}%",
+            'Status': "Pass" if candidate['passed'] else "Fail"
+        })
+
+    st.caption(f"Found {len(results)} candidates in {elapsed * 1000:.0f} ms")
+    st.dataframe(pd.DataFrame(results), hide_index=True)
+
+def show_semantic_search(username):
+    st.title("Semantic Search")
+
+    k = st.number_input("Number of results", min_value=1, max_value=100, value=10)
+
+    tab1, tab2 = st.tabs(["Search by Description", "More Like This"])
+
+    with tab1:
+        st.write("Find the resumes closest in meaning to a description, across all jobs.")
+        query = st.text_input("Describe the candidate", placeholder="embedded firmware with BLE")
+
+        if st.button("Search") and query:
+            started = time.perf_counter()
+            hits = search_candidates(query, int(k))
+            show_search_results(hits, time.perf_counter() - started)
+
+    with tab2:
+        st.write("Pick a candidate to find the most similar resumes across all jobs.")
+
+        # Get jobs created by the user
+        jobs = get_jobs(username)
+
+        if jobs.empty:
+            st.warning("No jobs found. Please create a job first.")
+            return
+
+        job_id = st.selectbox(
+            "Select a job",
+            jobs['id'].tolist(),
+            format_func=lambda x: jobs[jobs['id'] == x]['title'].iloc[0]
+        )
+
+        candidates = get_candidates(job_id) if job_id else pd.DataFrame()
+
+        if candidates.empty:
+            st.info("No candidates found for this job.")
+            return
+
+        candidate_id = st.selectbox(
+            "Select a candidate",
+            candidates['id'].tolist(),
+            format_func=lambda x: candidates[candidates['id'] == x]['name'].iloc[0] or f"Candidate {x}"
+        )
+
+        if st.button("Find Similar Candidates"):
+            started = time.perf_counter()
+            hits = more_like_this(candidate_id, int(k))
+
+            if hits is None:
+                st.warning("This candidate has no stored embedding. Screen the resume again to enable similarity search.")
+            else:
+                show_search_results(hits, time.perf_counter() - started)
@@ -0,0 +1,71 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+# Root directory of the content-addressed resume store
+BLOB_ROOT = Path("data/resumes")
+
+# Size of each chunk copied from an upload into the store
+CHUNK_SIZE = 1024 * 1024
+
+def blob_path(blob_id):
+    """Return the path of a blob, sharded by the first bytes of its hash."""
+    return BLOB_ROOT / blob_id[:2] / blob_id[2:4] / blob_id
+
+def blob_id_from_path(file_path):
+    """Return the blob id for a path inside the store, or None."""
+    path = Path(file_path)
+    try:
+        path.relative_to(BLOB_ROOT)
+    except ValueError:
+        return None
+    return path.name
+
+def store_stream(stream, filename):
+    """
+    Copy a binary stream into the store in chunks.
+
+    The blob id is the SHA-256 of the content plus the original file
+    extension, so identical files are stored once no matter how often or
+    under which name they are uploaded.
+
+    Args:
+        stream: A readable binary file object
+        filename: The original file name, used for its extension
+
+    Returns:
+        A (blob id, file path) tuple
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    BLOB_ROOT.mkdir(parents=True, exist_ok=True)
+
+    # Write to a temporary file while hashing, then move it into place
+    digest = hashlib.sha256()
+    fd, temp_path = tempfile.mkstemp(dir=BLOB_ROOT, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                f.write(chunk)
+
+        blob_id = digest.hexdigest() + ext
+        path = blob_path(blob_id)
+
+        if path.exists():
+            # Already stored, drop the duplicate
+            os.remove(temp_path)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return blob_id, str(path)
+
+def store_upload(uploaded_file):
+    """Store a Streamlit uploaded file and return its (blob id, file path)."""
+    uploaded_file.seek(0)
+    return store_stream(uploaded_file, uploaded_file.name)
@@ -0,0 +1,44 @@
+import os
+import sqlite3
+
+def get_compiled(cache, path, build):
+    """
+    Return what build made from a file, rebuilding it if the file changed.
+
+    Args:
+        cache: Dictionary keeping (modification time, result) per path
+        path: The file to build from
+        build: Called with the path, or None if the file does not exist
+
+    Returns:
+        The cached or newly built result
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+
+    cached = cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    result = build(path if mtime is not None else None)
+    cache[path] = (mtime, result)
+    return result
+
+def connect_cache_db(path, schema):
+    """
+    Open a cache database shared by worker processes, creating it if needed.
+
+    Args:
+        path: The database file
+        schema: SQL statements creating the cache's tables and indexes
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Worker processes share the cache, so wait on locks instead of failing
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    for statement in schema:
+        conn.execute(statement)
+    return conn
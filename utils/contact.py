@@ -0,0 +1,75 @@
+import re
+from bisect import bisect_right
+
+# Regular expressions for contact fields
+URL_REGEX = r'https?://\S+|www\.\S+'
+EMAIL_REGEX = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+PHONE_REGEX = r'(?<!\d)(?:\+\d{1,3}[-.\s]?)?(?:\(?\d{3}\)?[-.\s]?)?\d{3}[-.\s]?\d{4}(?!\d)'
+
+# One alternation so a single scan finds every field. URLs come first because
+# they can contain digits and "@", emails before phones for the same reason.
+CONTACT_REGEX = re.compile(
+    f'(?P<url>{URL_REGEX})|(?P<email>{EMAIL_REGEX})|(?P<phone>{PHONE_REGEX})'
+)
+
+# Number of leading lines searched for the candidate's name
+NAME_SEARCH_LINES = 5
+NAME_MAX_LENGTH = 50
+NAME_EXCLUDED_WORDS = ['resume', 'cv', 'curriculum']
+
+def scan_contact_fields(text):
+    """
+    Extract contact fields from resume text in a single scan.
+
+    Returns:
+        A dictionary with the first email, the first phone number, all URLs
+        and the name taken from the first lines of the resume
+    """
+    # Offsets of the lines that may hold the name
+    lines = text.split('\n', NAME_SEARCH_LINES)[:NAME_SEARCH_LINES]
+    line_starts = []
+    offset = 0
+    for line in lines:
+        line_starts.append(offset)
+        offset += len(line) + 1
+    name_region_end = offset
+
+    email = ""
+    phone = ""
+    urls = []
+    contact_lines = set()
+
+    for match in CONTACT_REGEX.finditer(text):
+        kind = match.lastgroup
+        if kind == 'url':
+            urls.append(match.group())
+            continue
+
+        if kind == 'email' and not email:
+            email = match.group()
+        elif kind == 'phone' and not phone:
+            phone = match.group().strip()
+
+        # Remember which of the leading lines contain an email or phone
+        if match.start() < name_region_end:
+            contact_lines.add(bisect_right(line_starts, match.start()) - 1)
+
+    name = ""
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if line and i not in contact_lines:
+            # Exclude lines that are too long or contain common headers
+            if len(line) < NAME_MAX_LENGTH and not any(word in line.lower() for word in NAME_EXCLUDED_WORDS):
+                name = line
+                break
+
+    return {
+        'name': name,
+        'email': email,
+        'phone': phone,
+        'urls': urls
+    }
+
+def strip_contact_fields(text, replacement=''):
+    """Remove URLs, email addresses and phone numbers from text in one pass."""
+    return CONTACT_REGEX.sub(replacement, text)
@@ -2,6 +2,7 @@ import sqlite3
 import os
 from pathlib import Path
 import pandas as pd
+import numpy as np
 
 # Database file path
 DB_PATH = Path("data/resume_screening.db")
@@ -49,6 +50,8 @@ def initialize_database():
         experience TEXT,
         skills TEXT,
         resume_path TEXT,
+        resume_blob_id TEXT,
+        screening_stage TEXT,
         score REAL DEFAULT 0,
         passed BOOLEAN DEFAULT 0,
         advanced BOOLEAN DEFAULT 0,
@@ -60,10 +63,75 @@ def initialize_database():
     )
     ''')
     
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS quarantine (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id INTEGER,
+        file_name TEXT,
+        resume_path TEXT,
+        resume_blob_id TEXT,
+        reason TEXT,
+        recovered BOOLEAN DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (job_id) REFERENCES jobs (id)
+    )
+    ''')
+    
+    # Resume vectors stored as float16; kind is 'resume' for the whole resume
+    # (position 0) or 'chunk' for section chunks in document order
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS candidate_embeddings (
+        candidate_id INTEGER NOT NULL,
+        job_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        section TEXT,
+        model TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        dim INTEGER NOT NULL,
+        embedding BLOB NOT NULL,
+        PRIMARY KEY (candidate_id, kind, position),
+        FOREIGN KEY (candidate_id) REFERENCES candidates (id),
+        FOREIGN KEY (job_id) REFERENCES jobs (id)
+    )
+    ''')
+    
+    # Taxonomy skills found in each candidate's resume
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS candidate_skills (
+        candidate_id INTEGER NOT NULL,
+        job_id INTEGER NOT NULL,
+        skill TEXT NOT NULL,
+        category TEXT,
+        mentions INTEGER DEFAULT 1,
+        PRIMARY KEY (candidate_id, skill),
+        FOREIGN KEY (candidate_id) REFERENCES candidates (id),
+        FOREIGN KEY (job_id) REFERENCES jobs (id)
+    )
+    ''')
+    
+    # Add columns introduced after the table was first created
+    add_missing_columns(cursor, 'candidates', {
+        'resume_blob_id': 'TEXT',
+        'screening_stage': 'TEXT'
+    })
+    
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidates_blob ON candidates (job_id, resume_blob_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidate_embeddings_job ON candidate_embeddings (job_id, kind, model, version)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidate_skills_job ON candidate_skills (job_id, skill)")
+    
     # Commit changes and close connection
     conn.commit()
     conn.close()
 
+# Function to add columns missing from an existing table
+def add_missing_columns(cursor, table, columns):
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    
+    for column, definition in columns.items():
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
 # Function to save a job
 def save_job(title, description, created_by):
     conn = sqlite3.connect(DB_PATH)
@@ -157,7 +225,7 @@ def save_candidate(job_id, candidate_data):
     # Convert nlp_results to JSON string if it exists
     nlp_results = None
     overall_similarity = 0
-    if 'nlp_results' in candidate_data:
+    if candidate_data.get('nlp_results') is not None:
         import json
         nlp_results = json.dumps(candidate_data['nlp_results'])
         overall_similarity = candidate_data['nlp_results'].get('overall_similarity', 0)
@@ -165,8 +233,8 @@ def save_candidate(job_id, candidate_data):
     cursor.execute(
         """
         INSERT INTO candidates 
-        (job_id, name, email, phone, education, experience, skills, resume_path, score, passed, summary, nlp_results, overall_similarity) 
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        (job_id, name, email, phone, education, experience, skills, resume_path, resume_blob_id, screening_stage, score, passed, summary, nlp_results, overall_similarity) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """,
         (
             job_id,
@@ -177,6 +245,8 @@ def save_candidate(job_id, candidate_data):
             candidate_data['experience'],
             candidate_data['skills'],
             candidate_data['resume_path'],
+            candidate_data.get('resume_blob_id'),
+            candidate_data.get('screening_stage'),
             candidate_data['score'],
             candidate_data['passed'],
             candidate_data['summary'],
@@ -187,11 +257,195 @@ def save_candidate(job_id, candidate_data):
     
     candidate_id = cursor.lastrowid
     
+    # Store the resume embedding and skill profile in the same transaction
+    if candidate_data.get('embedding'):
+        insert_candidate_embeddings(cursor, candidate_id, job_id, candidate_data['embedding'])
+    
+    if candidate_data.get('skill_profile'):
+        cursor.executemany(
+            "INSERT OR REPLACE INTO candidate_skills (candidate_id, job_id, skill, category, mentions) VALUES (?, ?, ?, ?, ?)",
+            [
+                (candidate_id, job_id, entry['skill'], entry['category'], entry['mentions'])
+                for entry in candidate_data['skill_profile']
+            ]
+        )
+    
     conn.commit()
     conn.close()
     
+    # Add the embedding to the in-memory search index if one is loaded
+    if candidate_data.get('embedding'):
+        from utils.vector_index import index_candidate_embedding
+        index_candidate_embedding(candidate_id, candidate_data['embedding'], candidate_data.get('resume_blob_id'))
+    
     return candidate_id
 
+# Function to store a candidate's resume and chunk embeddings
+def insert_candidate_embeddings(cursor, candidate_id, job_id, embedding):
+    rows = [('resume', 0, None, embedding['vector'])]
+    rows += [('chunk', i, section, vector) for i, (section, vector) in enumerate(embedding.get('chunks', []))]
+    
+    cursor.executemany(
+        """
+        INSERT OR REPLACE INTO candidate_embeddings 
+        (candidate_id, job_id, kind, position, section, model, version, dim, embedding) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                candidate_id,
+                job_id,
+                kind,
+                position,
+                section,
+                embedding['model'],
+                embedding['version'],
+                len(vector),
+                np.asarray(vector, dtype=np.float16).tobytes()
+            )
+            for kind, position, section, vector in rows
+        ]
+    )
+
+# Function to load a job's resume embeddings as one matrix
+def load_job_embeddings(job_id, model=None, version=None):
+    """
+    Load the resume embeddings of every candidate screened for a job.
+    
+    Only vectors from one encoder and embedding version are returned; by
+    default those of the most recently saved candidate.
+    
+    Returns:
+        A tuple of (candidate ids array, contiguous float32 matrix with one
+        row per candidate)
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    if model is None or version is None:
+        cursor.execute(
+            "SELECT model, version FROM candidate_embeddings WHERE job_id = ? AND kind = 'resume' ORDER BY candidate_id DESC LIMIT 1",
+            (job_id,)
+        )
+        latest = cursor.fetchone()
+        if latest is None:
+            conn.close()
+            return np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.float32)
+        model = model or latest[0]
+        version = version or latest[1]
+    
+    cursor.execute(
+        """
+        SELECT candidate_id, dim, embedding FROM candidate_embeddings 
+        WHERE job_id = ? AND kind = 'resume' AND model = ? AND version = ? 
+        ORDER BY candidate_id
+        """,
+        (job_id, model, version)
+    )
+    rows = cursor.fetchall()
+    
+    conn.close()
+    
+    return _embedding_rows_to_matrix(rows)
+
+# Function to load resume embeddings across all jobs
+def load_embeddings(model, version, after_id=0):
+    """
+    Load every candidate's resume embedding for one encoder and embedding version.
+    
+    Args:
+        after_id: Only load candidates with a larger id, to extend an
+            already loaded set
+    
+    Returns:
+        A tuple of (candidate ids array, contiguous float32 matrix with one
+        row per candidate, list of each candidate's resume blob id)
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        """
+        SELECT candidate_embeddings.candidate_id, candidate_embeddings.dim, candidate_embeddings.embedding, 
+               candidates.resume_blob_id 
+        FROM candidate_embeddings 
+        LEFT JOIN candidates ON candidates.id = candidate_embeddings.candidate_id 
+        WHERE kind = 'resume' AND model = ? AND version = ? AND candidate_id > ? 
+        ORDER BY candidate_id
+        """,
+        (model, version, after_id)
+    )
+    rows = cursor.fetchall()
+    
+    conn.close()
+    
+    candidate_ids, matrix = _embedding_rows_to_matrix([row[:3] for row in rows])
+    return candidate_ids, matrix, [row[3] for row in rows]
+
+# Function to load one candidate's resume embedding
+def load_candidate_embedding(candidate_id):
+    """
+    Returns:
+        A dictionary with the model, version and vector of the candidate's
+        resume embedding and the candidate's resume blob id, or None if no
+        embedding is stored
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        """
+        SELECT candidate_embeddings.model, candidate_embeddings.version, candidate_embeddings.embedding, 
+               candidates.resume_blob_id 
+        FROM candidate_embeddings 
+        LEFT JOIN candidates ON candidates.id = candidate_embeddings.candidate_id 
+        WHERE candidate_id = ? AND kind = 'resume'
+        """,
+        (candidate_id,)
+    )
+    row = cursor.fetchone()
+    
+    conn.close()
+    
+    if row is None:
+        return None
+    return {
+        'model': row[0],
+        'version': row[1],
+        'vector': np.frombuffer(row[2], dtype=np.float16).astype(np.float32),
+        'resume_blob_id': row[3]
+    }
+
+def _embedding_rows_to_matrix(rows):
+    """Stack (candidate id, dim, float16 blob) rows into ids and a float32 matrix."""
+    dim = rows[0][1] if rows else 0
+    candidate_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    matrix = np.empty((len(rows), dim), dtype=np.float32)
+    for i, (_, _, blob) in enumerate(rows):
+        matrix[i] = np.frombuffer(blob, dtype=np.float16)
+    
+    return candidate_ids, matrix
+
+# Function to load a candidate's chunk embeddings
+def load_chunk_embeddings(candidate_id):
+    """
+    Returns:
+        A tuple of (section names, float32 matrix with one row per chunk)
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        "SELECT position, dim, embedding, section FROM candidate_embeddings WHERE candidate_id = ? AND kind = 'chunk' ORDER BY position",
+        (candidate_id,)
+    )
+    rows = cursor.fetchall()
+    
+    conn.close()
+    
+    _, matrix = _embedding_rows_to_matrix([row[:3] for row in rows])
+    return [row[3] for row in rows], matrix
+
 # Function to get candidates for a job
 def get_candidates(job_id, passed_only=False):
     conn = sqlite3.connect(DB_PATH)
@@ -208,6 +462,114 @@ def get_candidates(job_id, passed_only=False):
     
     return candidates
 
+# Function to get the taxonomy skills of a job's candidates
+def get_candidate_skills(job_id):
+    conn = sqlite3.connect(DB_PATH)
+    
+    skills = pd.read_sql_query(
+        "SELECT candidate_id, skill, category, mentions FROM candidate_skills WHERE job_id = ?",
+        conn,
+        params=[job_id]
+    )
+    
+    conn.close()
+    
+    return skills
+
+# Function to get the ids of a job's candidates who have all the given skills
+def get_candidate_ids_with_skills(job_id, skills):
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    skills = list(dict.fromkeys(skills))
+    cursor.execute(
+        f"""
+        SELECT candidate_id FROM candidate_skills 
+        WHERE job_id = ? AND skill IN ({','.join('?' * len(skills))}) 
+        GROUP BY candidate_id HAVING COUNT(*) = ?
+        """,
+        [job_id] + skills + [len(skills)]
+    )
+    candidate_ids = {row[0] for row in cursor.fetchall()}
+    
+    conn.close()
+    
+    return candidate_ids
+
+# Function to get candidates by id, with the title of the job they applied to
+def get_candidates_by_ids(candidate_ids):
+    conn = sqlite3.connect(DB_PATH)
+    
+    candidate_ids = [int(candidate_id) for candidate_id in candidate_ids]
+    candidates = pd.read_sql_query(
+        f"""
+        SELECT candidates.*, jobs.title AS job_title FROM candidates 
+        LEFT JOIN jobs ON jobs.id = candidates.job_id 
+        WHERE candidates.id IN ({','.join('?' * len(candidate_ids))})
+        """,
+        conn,
+        params=candidate_ids
+    )
+    
+    conn.close()
+    
+    return candidates
+
+# Function to get the resume blob ids already screened for a job
+def get_candidate_blob_ids(job_id):
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        "SELECT DISTINCT resume_blob_id FROM candidates WHERE job_id = ? AND resume_blob_id IS NOT NULL",
+        (job_id,)
+    )
+    blob_ids = {row[0] for row in cursor.fetchall()}
+    
+    conn.close()
+    
+    return blob_ids
+
+# Function to record a resume that hit the parser's time or memory limits
+def save_quarantine(job_id, file_name, resume_path, resume_blob_id, incident):
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    reason = incident['reason']
+    if incident.get('fallback_reason'):
+        reason += f"; fallback: {incident['fallback_reason']}"
+    
+    cursor.execute(
+        "INSERT INTO quarantine (job_id, file_name, resume_path, resume_blob_id, reason, recovered) VALUES (?, ?, ?, ?, ?, ?)",
+        (job_id, file_name, resume_path, resume_blob_id, reason, incident.get('recovered', False))
+    )
+    
+    quarantine_id = cursor.lastrowid
+    
+    conn.commit()
+    conn.close()
+    
+    return quarantine_id
+
+# Function to get quarantined resumes
+def get_quarantine(job_id=None):
+    conn = sqlite3.connect(DB_PATH)
+    
+    query = "SELECT * FROM quarantine"
+    params = []
+    
+    if job_id:
+        query += " WHERE job_id = ?"
+        params.append(job_id)
+    
+    query += " ORDER BY created_at DESC"
+    
+    quarantine = pd.read_sql_query(query, conn, params=params)
+    
+    conn.close()
+    
+    return quarantine
+
 # Function to update candidate status
 def update_candidate_status(candidate_id, advanced):
     conn = sqlite3.connect(DB_PATH)
@@ -0,0 +1,103 @@
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+# XML namespaces used in DOCX parts
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+MC_NS = '{http://schemas.openxmlformats.org/markup-compatibility/2006}'
+
+# Element tags
+PARAGRAPH = W_NS + 'p'
+TEXT = W_NS + 't'
+TAB = W_NS + 'tab'
+BREAKS = {W_NS + 'br', W_NS + 'cr'}
+ROW = W_NS + 'tr'
+CELL = W_NS + 'tc'
+TABLE = W_NS + 'tbl'
+# Text boxes are stored twice (modern and VML fallback), skip the fallback copy
+FALLBACK = MC_NS + 'Fallback'
+
+HEADER_PART = re.compile(r'^word/header\d*\.xml$')
+FOOTER_PART = re.compile(r'^word/footer\d*\.xml$')
+
+def _part_order(names):
+    """Return the text-bearing parts of a DOCX in reading order."""
+    headers = sorted(name for name in names if HEADER_PART.match(name))
+    footers = sorted(name for name in names if FOOTER_PART.match(name))
+    body = ['word/document.xml'] if 'word/document.xml' in names else []
+    return headers + body + footers
+
+def iter_part_lines(stream):
+    """
+    Yield text lines from one WordprocessingML part using an incremental parser.
+
+    Paragraphs, including those inside text boxes, become one line each.
+    Table rows become one line with cells separated by tabs.
+    """
+    paragraphs = []   # text runs of the open paragraphs (text boxes nest them)
+    rows = []         # cells of the open table rows
+    cells = []        # paragraphs of the open table cells
+    fallback_depth = 0
+
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        tag = elem.tag
+
+        if tag == FALLBACK:
+            fallback_depth += 1 if event == 'start' else -1
+            if event == 'end':
+                elem.clear()
+            continue
+
+        if fallback_depth:
+            continue
+
+        if event == 'start':
+            if tag == PARAGRAPH:
+                paragraphs.append([])
+            elif tag == ROW:
+                rows.append([])
+            elif tag == CELL:
+                cells.append([])
+            continue
+
+        if tag == TEXT:
+            if paragraphs and elem.text:
+                paragraphs[-1].append(elem.text)
+        elif tag == TAB:
+            if paragraphs:
+                paragraphs[-1].append('\t')
+        elif tag in BREAKS:
+            if paragraphs:
+                paragraphs[-1].append('\n')
+        elif tag == PARAGRAPH:
+            text = ''.join(paragraphs.pop())
+            if cells:
+                cells[-1].append(text)
+            else:
+                yield text
+            elem.clear()
+        elif tag == CELL:
+            cell_text = ' '.join(text.strip() for text in cells.pop() if text.strip())
+            if rows:
+                rows[-1].append(cell_text)
+        elif tag == ROW:
+            row_text = '\t'.join(rows.pop())
+            # Nested tables end up inside the enclosing cell
+            if cells:
+                cells[-1].append(row_text)
+            else:
+                yield row_text
+            elem.clear()
+        elif tag == TABLE:
+            elem.clear()
+
+def iter_docx_lines(file):
+    """Yield text lines from a DOCX file path or binary file object."""
+    with zipfile.ZipFile(file) as archive:
+        for name in _part_order(archive.namelist()):
+            with archive.open(name) as stream:
+                yield from iter_part_lines(stream)
+
+def extract_docx_text(file):
+    """Extract text from paragraphs, tables, headers and text boxes of a DOCX."""
+    return '\n'.join(iter_docx_lines(file))
@@ -0,0 +1,99 @@
+import sqlite3
+import hashlib
+import time
+from pathlib import Path
+import numpy as np
+from utils.caching import connect_cache_db
+
+# Cache database file path
+EMBEDDING_CACHE_DB_PATH = Path("data/embedding_cache.db")
+
+# Maximum number of cached embeddings before the least recently used are evicted
+MAX_CACHED_EMBEDDINGS = 100000
+
+# SQLite limits the number of bound parameters per statement
+QUERY_CHUNK_SIZE = 500
+
+EMBEDDING_CACHE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS embedding_cache (
+        model TEXT NOT NULL,
+        text_hash TEXT NOT NULL,
+        embedding BLOB NOT NULL,
+        last_access REAL NOT NULL,
+        PRIMARY KEY (model, text_hash)
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_access ON embedding_cache (last_access)"
+]
+
+def _connect():
+    """Open the cache database, creating it if needed."""
+    return connect_cache_db(EMBEDDING_CACHE_DB_PATH, EMBEDDING_CACHE_SCHEMA)
+
+def text_hash(text):
+    """Return the SHA-256 hex digest of a normalized text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def get_cached_embeddings(model, texts):
+    """
+    Look up cached embeddings for normalized texts.
+
+    Returns:
+        A dictionary mapping each text found in the cache to its embedding
+    """
+    hashes = {text_hash(text): text for text in texts}
+    found = {}
+
+    try:
+        conn = _connect()
+        keys = list(hashes)
+        for i in range(0, len(keys), QUERY_CHUNK_SIZE):
+            chunk = keys[i:i + QUERY_CHUNK_SIZE]
+            rows = conn.execute(
+                f"SELECT text_hash, embedding FROM embedding_cache WHERE model = ? AND text_hash IN ({','.join('?' * len(chunk))})",
+                [model] + chunk
+            ).fetchall()
+            for key, blob in rows:
+                found[hashes[key]] = np.frombuffer(blob, dtype=np.float32)
+
+        if found:
+            now = time.time()
+            conn.executemany(
+                "UPDATE embedding_cache SET last_access = ? WHERE model = ? AND text_hash = ?",
+                [(now, model, text_hash(text)) for text in found]
+            )
+            conn.commit()
+
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"Error reading embedding cache: {e}")
+
+    return found
+
+def put_cached_embeddings(model, embeddings):
+    """Store embeddings for normalized texts and evict the least recently used."""
+    now = time.time()
+    rows = [
+        (model, text_hash(text), np.asarray(embedding, dtype=np.float32).tobytes(), now)
+        for text, embedding in embeddings.items()
+    ]
+
+    try:
+        conn = _connect()
+        conn.executemany(
+            "INSERT OR REPLACE INTO embedding_cache (model, text_hash, embedding, last_access) VALUES (?, ?, ?, ?)",
+            rows
+        )
+
+        count = conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        if count > MAX_CACHED_EMBEDDINGS:
+            conn.execute(
+                "DELETE FROM embedding_cache WHERE rowid IN (SELECT rowid FROM embedding_cache ORDER BY last_access LIMIT ?)",
+                (count - MAX_CACHED_EMBEDDINGS,)
+            )
+
+        conn.commit()
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"Error writing embedding cache: {e}")
@@ -0,0 +1,305 @@
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from utils.blobstore import blob_id_from_path, store_stream
+from utils.parser import parse_resume
+from utils.sandbox import get_worker_context, parse_resume_sandboxed
+from utils.models import warm_up_models
+from utils.screening import screen_candidate, screen_candidates
+
+# Default number of worker processes for parallel ingestion
+# (leave one core free for the Streamlit server)
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+
+# Files queued per worker by process_resumes_parallel; more files are read
+# only as earlier ones finish
+FILES_IN_FLIGHT_PER_WORKER = 2
+
+# Number of parsed resumes screened together by process_resumes_batch
+SCREENING_BATCH_SIZE = 32
+
+# File types the parser can read
+SUPPORTED_EXTENSIONS = {'.pdf', '.docx'}
+
+# Archive or folder entries larger than this are skipped
+MAX_MEMBER_BYTES = 25 * 1024 * 1024
+
+def build_candidate_record(parsed_data, screening_result, file_path):
+    """Build the candidate record saved to the database."""
+    return {
+        'name': parsed_data['name'],
+        'email': parsed_data['email'],
+        'phone': parsed_data['phone'],
+        'education': parsed_data['education'],
+        'experience': parsed_data['experience'],
+        'skills': parsed_data['skills'],
+        'resume_path': file_path,
+        'resume_blob_id': blob_id_from_path(file_path),
+        'score': screening_result['score'],
+        'passed': screening_result['passed'],
+        'summary': screening_result['summary'],
+        'nlp_results': screening_result.get('nlp_results', {}),
+        'embedding': screening_result.get('embedding'),
+        'skill_profile': screening_result.get('skill_profile'),
+        'screening_stage': screening_result.get('screening_stage')
+    }
+
+def _parse_file(file_path, sandbox):
+    """Parse one resume file, returning (parsed data, incident)."""
+    if sandbox:
+        return parse_resume_sandboxed(file_path)
+    return parse_resume(file_path), None
+
+def process_resume(file_path, criteria, job_description="", sandbox=True, cascade=False):
+    """Parse and screen a single resume file.
+
+    With sandbox=True the file is parsed in an isolated worker process with
+    time and memory limits; any limit breach is returned as an 'incident'.
+    With cascade=True, candidates missing a required criterion are rejected
+    before the full NLP analysis (see screen_candidates).
+    Returns None if no text could be extracted and nothing went wrong.
+    """
+    parsed_data, incident = _parse_file(file_path, sandbox)
+
+    if not parsed_data:
+        if incident:
+            return {'parsed': None, 'screening': None, 'candidate': None, 'incident': incident}
+        return None
+
+    screening_result = screen_candidate(parsed_data, criteria, job_description, cascade)
+
+    return {
+        'parsed': parsed_data,
+        'screening': screening_result,
+        'candidate': build_candidate_record(parsed_data, screening_result, file_path),
+        'incident': incident
+    }
+
+def process_resumes_parallel(files, criteria, job_description="", max_workers=None, sandbox=True, cascade=False):
+    """
+    Parse and screen resumes in a process pool.
+
+    Args:
+        files: Iterable of (display name, file path) tuples
+        criteria: Criteria DataFrame for the job
+        job_description: The full text of the job description
+        max_workers: Number of worker processes (defaults to DEFAULT_WORKERS)
+        sandbox: Parse each file in an isolated process with resource limits
+        cascade: Reject candidates missing a required criterion before the
+            full NLP analysis
+
+    Yields:
+        A dictionary per file, in completion order, with the file name, path,
+        the process_resume result and an error message if the file failed
+    """
+    max_workers = max_workers or DEFAULT_WORKERS
+    max_in_flight = FILES_IN_FLIGHT_PER_WORKER * max_workers
+    files = iter(files)
+
+    # Workers start from a clean process rather than forking the caller, which
+    # may be the Streamlit server with its models already loaded; each worker
+    # loads the models once when it starts
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=get_worker_context(),
+                             initializer=warm_up_models) as executor:
+        futures = {}
+        while True:
+            # Submit files as they arrive, so screening starts while an
+            # archive is still being read
+            for name, file_path in islice(files, max_in_flight - len(futures)):
+                futures[executor.submit(process_resume, file_path, criteria, job_description, sandbox, cascade)] = (name, file_path)
+
+            if not futures:
+                break
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, file_path = futures.pop(future)
+
+                # A failing file is reported but does not stop the rest of the batch
+                try:
+                    result = future.result()
+                    error = None
+                except Exception as e:
+                    result = None
+                    error = str(e)
+
+                yield {
+                    'file': name,
+                    'file_path': file_path,
+                    'result': result,
+                    'error': error
+                }
+
+def process_resumes_batch(files, criteria, job_description="", sandbox=True, batch_size=SCREENING_BATCH_SIZE,
+                          cascade=False):
+    """
+    Parse resumes one by one and screen them in batches with screen_candidates.
+
+    Args:
+        files: Iterable of (display name, file path) tuples
+        criteria: Criteria DataFrame for the job
+        job_description: The full text of the job description
+        sandbox: Parse each file in an isolated process with resource limits
+        batch_size: Number of parsed resumes screened together
+        cascade: Reject candidates missing a required criterion before the
+            full NLP analysis
+
+    Yields:
+        A dictionary per file, in input order, in the same form as
+        process_resumes_parallel
+    """
+    pending = []
+
+    def screen_pending():
+        try:
+            screening_results = screen_candidates([item['parsed'] for item in pending], criteria, job_description, cascade)
+            errors = [None] * len(pending)
+        except Exception:
+            # One bad resume must not fail the whole batch, so screen each
+            # file on its own and report only the ones that still fail
+            screening_results = []
+            errors = []
+            for item in pending:
+                try:
+                    screening_results.append(screen_candidates([item['parsed']], criteria, job_description, cascade)[0])
+                    errors.append(None)
+                except Exception as e:
+                    screening_results.append(None)
+                    errors.append(str(e))
+
+        for item, screening_result, error in zip(pending, screening_results, errors):
+            if error:
+                yield {'file': item['file'], 'file_path': item['file_path'], 'result': None, 'error': error}
+                continue
+            yield {
+                'file': item['file'],
+                'file_path': item['file_path'],
+                'result': {
+                    'parsed': item['parsed'],
+                    'screening': screening_result,
+                    'candidate': build_candidate_record(item['parsed'], screening_result, item['file_path']),
+                    'incident': item['incident']
+                },
+                'error': None
+            }
+        pending.clear()
+
+    for name, file_path in files:
+        # A file that fails to parse is reported but does not stop the batch
+        try:
+            parsed_data, incident = _parse_file(file_path, sandbox)
+        except Exception as e:
+            yield {'file': name, 'file_path': file_path, 'result': None, 'error': str(e)}
+            continue
+
+        if not parsed_data:
+            result = None
+            if incident:
+                result = {'parsed': None, 'screening': None, 'candidate': None, 'incident': incident}
+            yield {'file': name, 'file_path': file_path, 'result': result, 'error': None}
+            continue
+
+        pending.append({'file': name, 'file_path': file_path, 'parsed': parsed_data, 'incident': incident})
+        if len(pending) >= batch_size:
+            yield from screen_pending()
+
+    if pending:
+        yield from screen_pending()
+
+def iter_archive_members(archive_file):
+    """Yield (name, size, opener) for each file in a ZIP archive.
+
+    The opener returns a stream that decompresses the member on the fly.
+    """
+    with zipfile.ZipFile(archive_file) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or info.filename.startswith('__MACOSX/'):
+                continue
+            yield info.filename, info.file_size, lambda info=info: archive.open(info)
+
+def iter_directory_files(directory):
+    """Yield (name, size, opener) for each file under a server-side directory."""
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        for name in sorted(names):
+            file_path = os.path.join(root, name)
+            try:
+                size = os.path.getsize(file_path)
+            except OSError:
+                # E.g. a broken link; opening it fails and counts it as unreadable
+                size = 0
+            yield file_path, size, lambda file_path=file_path: open(file_path, 'rb')
+
+def count_supported(names):
+    """Count the entries the parser can read."""
+    return sum(1 for name in names if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS)
+
+def new_ingestion_stats():
+    """Return an empty counter dictionary for stream_into_store."""
+    return {
+        'stored': 0,
+        'bytes': 0,
+        'duplicates': 0,
+        'unsupported': 0,
+        'too_large': 0,
+        'unreadable': 0,
+        'started': time.time()
+    }
+
+def stream_into_store(members, stats, known_blob_ids=()):
+    """
+    Stream archive or folder entries into the resume store.
+
+    Entries are copied straight from their (decompressing) streams into the
+    content-addressed store, so nothing is unpacked to a scratch directory.
+
+    Args:
+        members: Iterable of (name, size, opener) tuples
+        stats: Counter dictionary from new_ingestion_stats, updated in place
+        known_blob_ids: Blob ids already screened for the job
+
+    Yields:
+        (display name, file path) tuples for new, supported resumes
+    """
+    seen = set(known_blob_ids)
+
+    for name, size, open_member in members:
+        if os.path.splitext(name)[1].lower() not in SUPPORTED_EXTENSIONS:
+            stats['unsupported'] += 1
+            continue
+
+        if size > MAX_MEMBER_BYTES:
+            stats['too_large'] += 1
+            continue
+
+        # A corrupt, encrypted or unreadable entry is skipped, not fatal
+        try:
+            with open_member() as stream:
+                blob_id, file_path = store_stream(stream, name)
+        except Exception as e:
+            print(f"Error reading {name}: {e}")
+            stats['unreadable'] += 1
+            continue
+
+        stats['stored'] += 1
+        stats['bytes'] += size
+
+        if blob_id in seen:
+            stats['duplicates'] += 1
+            continue
+        seen.add(blob_id)
+
+        yield os.path.basename(name), file_path
+
+def format_throughput(stats, processed):
+    """Describe ingestion throughput for display."""
+    elapsed = max(time.time() - stats['started'], 1e-6)
+    megabytes = stats['bytes'] / (1024 * 1024)
+    return (
+        f"{processed} processed, {stats['duplicates']} duplicate(s), "
+        f"{stats['unsupported']} unsupported, {stats['too_large']} too large, "
+        f"{stats['unreadable']} unreadable | "
+        f"{processed / elapsed:.1f} resumes/s, {megabytes / elapsed:.1f} MB/s read"
+    )
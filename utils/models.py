@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+# Model names
+SPACY_MODEL_NAME = "en_core_web_sm"
+ENCODER_MODEL_NAME = 'paraphrase-MiniLM-L6-v2'  # Smaller, faster model
+
+# Directory where sentence-transformers caches downloaded models
+MODEL_CACHE_DIR = Path("models")
+
+# Encoder inference backend: 'torch' runs the model through PyTorch, 'onnx'
+# runs an int8-quantized export through ONNX Runtime and falls back to
+# PyTorch if the export or runtime is unavailable
+ENCODER_BACKEND = os.environ.get("ENCODER_BACKEND", "torch").lower()
+
+# One instance of each model per process, loaded on first use
+_models = {}
+_load_times = {}
+_lock = threading.Lock()
+
+def _get_model(key, loader):
+    """Return a shared model, loading it on first use."""
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            # Another thread may have loaded it while we waited
+            model = _models.get(key)
+            if model is None:
+                started = time.perf_counter()
+                model = loader()
+                _load_times[key] = time.perf_counter() - started
+                print(f"Loaded {key} model in {_load_times[key]:.2f}s")
+                _models[key] = model
+    return model
+
+def _load_spacy():
+    """Load the spaCy pipeline, downloading it if it is not installed."""
+    import spacy
+    try:
+        nlp = spacy.load(SPACY_MODEL_NAME)
+    except OSError:
+        from spacy.cli import download
+        download(SPACY_MODEL_NAME)
+        nlp = spacy.load(SPACY_MODEL_NAME)
+
+    # Nothing uses the dependency parse, only sentence boundaries, so swap
+    # the parser for the much cheaper sentence recognizer when available
+    if 'senter' in nlp.component_names and 'parser' in nlp.pipe_names:
+        nlp.enable_pipe('senter')
+        nlp.disable_pipe('parser')
+
+    return nlp
+
+def _load_torch_encoder():
+    """Load the sentence transformer with local caching."""
+    from sentence_transformers import SentenceTransformer
+    MODEL_CACHE_DIR.mkdir(exist_ok=True)
+    return SentenceTransformer(ENCODER_MODEL_NAME, cache_folder=str(MODEL_CACHE_DIR))
+
+def _load_onnx_encoder():
+    """Load the quantized ONNX encoder, exporting it on first use."""
+    from utils.onnx_encoder import OnnxSentenceEncoder, ensure_exported
+    ensure_exported(_load_torch_encoder, ENCODER_MODEL_NAME)
+    return OnnxSentenceEncoder()
+
+def _load_encoder():
+    """Load the sentence encoder for the configured backend."""
+    if ENCODER_BACKEND == 'onnx':
+        try:
+            return _load_onnx_encoder()
+        except Exception as e:
+            print(f"ONNX encoder unavailable, falling back to PyTorch: {e}")
+    return _load_torch_encoder()
+
+def get_spacy():
+    """Return the shared spaCy pipeline."""
+    return _get_model('spacy', _load_spacy)
+
+def get_encoder():
+    """Return the shared sentence transformer."""
+    return _get_model('encoder', _load_encoder)
+
+def get_encoder_id():
+    """
+    Return an identifier for the encoder, used to key cached embeddings.
+
+    Quantized embeddings differ slightly from the PyTorch ones, so the
+    backend is part of the identifier when it is not PyTorch.
+    """
+    backend = getattr(get_encoder(), 'backend', None)
+    return f"{ENCODER_MODEL_NAME}:{backend}" if backend else ENCODER_MODEL_NAME
+
+def check_encoder_parity(texts=None):
+    """
+    Compare the quantized ONNX encoder with the PyTorch reference.
+
+    Returns:
+        A dictionary with the mean and minimum cosine similarity between the
+        two backends and the maximum cosine drift
+    """
+    from utils.onnx_encoder import check_encoder_parity as compare, PARITY_TEXTS
+    return compare(_load_torch_encoder(), _load_onnx_encoder(), texts or PARITY_TEXTS)
+
+def warm_up_models():
+    """Load every model now instead of on first use and return the load times."""
+    get_spacy()
+    get_encoder()
+    return get_load_times()
+
+def get_load_times():
+    """Return the load time in seconds of each model loaded in this process."""
+    return dict(_load_times)
@@ -1,39 +1,75 @@
-import spacy
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import re
-import os
-from pathlib import Path
+from collections import OrderedDict
+from utils.contact import strip_contact_fields
+from utils.models import get_spacy, get_encoder, get_encoder_id
+from utils.sections import segment_sections
+from utils.titles import JOB_TITLES_PATH, get_title_index, find_titles
+from utils.embedding_cache import get_cached_embeddings, put_cached_embeddings
 
-# Load spaCy model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except:
-    os.system("python -m spacy download en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
+# spaCy components each analysis feature needs. tok2vec is always kept
+# because the tagger and sentence components listen to it.
+FEATURE_COMPONENTS = {
+    'lemmas': ['tok2vec', 'tagger', 'attribute_ruler', 'lemmatizer'],
+    'sentences': ['tok2vec', 'senter', 'parser', 'sentencizer'],
+    'entities': ['tok2vec', 'ner']
+}
+ANALYSIS_FEATURES = ['lemmas', 'sentences', 'entities']
 
-# Load sentence transformer model
-model_name = 'paraphrase-MiniLM-L6-v2'  # Smaller, faster model
-model_cache_dir = Path("models")
-model_cache_dir.mkdir(exist_ok=True)
+# Number of texts per nlp.pipe batch
+SPACY_BATCH_SIZE = 32
 
-# Initialize the model with caching
-model = SentenceTransformer(model_name, cache_folder=str(model_cache_dir))
+# Number of texts per encoder forward pass
+ENCODER_BATCH_SIZE = 64
+
+# Version of the stored resume embeddings; bump when preprocessing or pooling
+# changes so vectors from different versions are never compared
+EMBEDDING_VERSION = 1
+
+# Chunked embedding: embed long resumes as overlapping token windows rather
+# than one string the encoder silently truncates
+CHUNKED_EMBEDDINGS = False
+CHUNK_OVERLAP_TOKENS = 16
+CHUNK_POOLING = 'max'
+
+def _disabled_components(nlp, features):
+    """Return the active pipeline components the given features do not need."""
+    needed = {name for feature in features for name in FEATURE_COMPONENTS[feature]}
+    return [name for name in nlp.pipe_names if name not in needed]
+
+def parse_doc(text, features=ANALYSIS_FEATURES):
+    """Run spaCy over one text with only the components the features need."""
+    nlp = get_spacy()
+    return nlp(text, disable=_disabled_components(nlp, features))
+
+def parse_docs(texts, features=ANALYSIS_FEATURES, n_process=1, batch_size=SPACY_BATCH_SIZE):
+    """
+    Run spaCy over many texts in one nlp.pipe pass.
+    
+    Args:
+        texts: Texts to process
+        features: Analysis features the Docs must support (see FEATURE_COMPONENTS)
+        n_process: Number of processes nlp.pipe may use
+        batch_size: Number of texts per batch
+        
+    Returns:
+        A list of Docs in the same order as texts
+    """
+    nlp = get_spacy()
+    return list(nlp.pipe(
+        texts,
+        disable=_disabled_components(nlp, features),
+        n_process=n_process,
+        batch_size=batch_size
+    ))
 
 def preprocess_text(text):
     """Clean and preprocess text for NLP analysis."""
     # Convert to lowercase
     text = text.lower()
     
-    # Remove URLs
-    text = re.sub(r'https?://\S+|www\.\S+', '', text)
-    
-    # Remove email addresses
-    text = re.sub(r'\S+@\S+', '', text)
-    
-    # Remove phone numbers
-    text = re.sub(r'$$?\d{3}$$?[-.\s]?\d{3}[-.\s]?\d{4}', '', text)
+    # Remove URLs, email addresses and phone numbers
+    text = strip_contact_fields(text)
     
     # Remove special characters and extra whitespace
     text = re.sub(r'[^\w\s]', ' ', text)
@@ -41,9 +77,10 @@ def preprocess_text(text):
     
     return text
 
-def extract_entities(text):
+def extract_entities(text, doc=None):
     """Extract named entities from text using spaCy."""
-    doc = nlp(text)
+    if doc is None:
+        doc = parse_doc(text, ['entities'])
     entities = {}
     
     for ent in doc.ents:
@@ -53,27 +90,71 @@ def extract_entities(text):
     
     return entities
 
-def extract_skills(text, skill_list):
+class CriteriaMatcher:
+    """
+    A job's criteria compiled once for matching against resume Docs.
+    
+    A criterion matches when its lowercased text occurs as a phrase in the
+    resume, or when all of its lemmas occur somewhere in the resume.
+    """
+    
+    def __init__(self, criteria_list):
+        from spacy.matcher import PhraseMatcher
+        
+        nlp = get_spacy()
+        self.criteria = list(criteria_list)
+        self.vocab = nlp.vocab
+        
+        # Exact phrases, matched token by token on lowercase text
+        self.phrase_matcher = PhraseMatcher(nlp.vocab, attr='LOWER')
+        for i, criterion in enumerate(self.criteria):
+            self.phrase_matcher.add(str(i), [nlp.make_doc(criterion.lower())])
+        
+        # Lemma sets, computed in one nlp.pipe pass
+        criteria_docs = parse_docs([criterion.lower() for criterion in self.criteria], ['lemmas'])
+        self.lemma_sets = [frozenset(token.lemma_ for token in criterion_doc) for criterion_doc in criteria_docs]
+    
+    def match(self, doc):
+        """Return the criteria found in a resume Doc, in criteria order."""
+        found = {int(self.vocab.strings[match_id]) for match_id, start, end in self.phrase_matcher(doc)}
+        
+        # If all lemmas in the criterion are found in the document
+        doc_lemmas = {token.lemma_ for token in doc}
+        for i, lemmas in enumerate(self.lemma_sets):
+            if i not in found and lemmas.issubset(doc_lemmas):
+                found.add(i)
+        
+        return [self.criteria[i] for i in sorted(found)]
+
+# Compiled matchers keyed by a job's criteria, most recently used last
+_criteria_matchers = OrderedDict()
+MAX_CRITERIA_MATCHERS = 64
+
+def get_criteria_matcher(criteria_list):
+    """Return the compiled matcher for a set of criteria, building it once."""
+    key = tuple(criteria_list)
+    matcher = _criteria_matchers.get(key)
+    
+    if matcher is None:
+        matcher = CriteriaMatcher(key)
+        _criteria_matchers[key] = matcher
+        if len(_criteria_matchers) > MAX_CRITERIA_MATCHERS:
+            _criteria_matchers.popitem(last=False)
+    else:
+        _criteria_matchers.move_to_end(key)
+    
+    return matcher
+
+def invalidate_criteria_matchers():
+    """Drop compiled criteria matchers, e.g. after a job's criteria are saved."""
+    _criteria_matchers.clear()
+
+def extract_skills(text, skill_list, doc=None):
     """Extract skills from text using a predefined skill list and NLP."""
-    doc = nlp(text.lower())
-    found_skills = set()
-    
-    # Direct matching
-    for skill in skill_list:
-        skill_lower = skill.lower()
-        if skill_lower in text.lower():
-            found_skills.add(skill)
-    
-    # Lemmatized matching
-    doc_lemmas = {token.lemma_ for token in doc}
-    for skill in skill_list:
-        skill_doc = nlp(skill.lower())
-        skill_lemmas = {token.lemma_ for token in skill_doc}
-        # If all lemmas in the skill are found in the document
-        if skill_lemmas.issubset(doc_lemmas):
-            found_skills.add(skill)
-    
-    return list(found_skills)
+    if doc is None:
+        doc = parse_doc(text.lower(), ['lemmas'])
+    
+    return get_criteria_matcher(skill_list).match(doc)
 
 def get_embedding(text):
     """Get embedding vector for text using sentence-transformers."""
@@ -81,26 +162,174 @@ def get_embedding(text):
     text = preprocess_text(text)
     
     # Get embedding
-    embedding = model.encode(text)
+    embedding = get_encoder().encode(text)
     
     return embedding
 
+def embed_texts(texts):
+    """Embed several preprocessed texts in one batched encode call.
+
+    Rows are normalized to unit length, so a dot product is a cosine similarity.
+    """
+    return get_encoder().encode(list(texts), batch_size=ENCODER_BATCH_SIZE, normalize_embeddings=True)
+
+def embed_batch(texts, cached_texts=()):
+    """
+    Embed texts and cache-backed texts in a single encode call.
+    
+    Args:
+        texts: Preprocessed texts that are always encoded (e.g. resumes)
+        cached_texts: Preprocessed texts looked up in the persistent embedding
+            cache first (e.g. job descriptions and criteria); only misses are
+            encoded, and they are stored for next time
+    
+    Returns:
+        A tuple of (embeddings of texts, embeddings of cached_texts)
+    """
+    texts = list(texts)
+    cached_texts = list(cached_texts)
+    model_id = get_encoder_id()
+    
+    cached = get_cached_embeddings(model_id, cached_texts) if cached_texts else {}
+    missing = [text for text in dict.fromkeys(cached_texts) if text not in cached]
+    
+    if texts or missing:
+        embeddings = embed_texts(texts + missing)
+    else:
+        embeddings = np.zeros((0, 0), dtype=np.float32)
+    
+    if missing:
+        new_embeddings = dict(zip(missing, embeddings[len(texts):]))
+        put_cached_embeddings(model_id, new_embeddings)
+        cached.update(new_embeddings)
+    
+    text_embeddings = embeddings[:len(texts)]
+    cached_embeddings = np.array([cached[text] for text in cached_texts], dtype=np.float32)
+    
+    return text_embeddings, cached_embeddings
+
+def cache_job_embeddings(job_description, criteria_list):
+    """Embed a job's description and criteria into the persistent cache."""
+    cached_texts = [preprocess_text(job_description)] + [preprocess_text(criterion) for criterion in criteria_list]
+    embed_batch([], cached_texts)
+
+def chunk_resume(resume_text, max_tokens=None, overlap=CHUNK_OVERLAP_TOKENS, sections=None):
+    """
+    Split a resume into windows short enough for the encoder to see whole.
+    
+    The resume is first split into sections, then each section's cleaned text
+    is cut into overlapping windows of at most max_tokens encoder tokens.
+    
+    Args:
+        resume_text: The full text of the resume
+        max_tokens: Tokens per window (defaults to the encoder's limit)
+        overlap: Tokens shared by consecutive windows
+        sections: The section line spans parse_resume found in the text,
+            segmented again if not given
+        
+    Returns:
+        A list of (section name, chunk text) tuples in document order
+    """
+    encoder = get_encoder()
+    tokenizer = encoder.tokenizer
+    # Leave room for the [CLS] and [SEP] tokens
+    max_tokens = max_tokens or encoder.max_seq_length - 2
+    step = max(max_tokens - overlap, 1)
+    
+    # Section blocks in document order; text before the first header is the profile
+    lines = resume_text.split('\n')
+    if sections is None:
+        sections = segment_sections(lines)
+    blocks = sorted(
+        (start, end, section)
+        for section, spans in sections.items()
+        for start, end in spans
+    )
+    first_header = blocks[0][0] if blocks else len(lines)
+    if first_header > 0:
+        blocks.insert(0, (0, first_header, 'profile'))
+    
+    chunks = []
+    for start, end, section in blocks:
+        clean = preprocess_text('\n'.join(lines[start:end]))
+        if not clean:
+            continue
+        
+        token_ids = tokenizer.encode(clean, add_special_tokens=False)
+        for i in range(0, len(token_ids), step):
+            chunks.append((section, tokenizer.decode(token_ids[i:i + max_tokens])))
+            if i + max_tokens >= len(token_ids):
+                break
+    
+    return chunks
+
+def _resume_similarities(resume_texts, resume_sections, resume_cleans, job_clean, criteria_clean, chunked, pooling):
+    """
+    Compare resumes with a job description and its criteria.
+    
+    Every resume (or resume chunk) is embedded in one batch together with any
+    job description and criteria missing from the embedding cache.
+    
+    Returns:
+        A list with a tuple per resume of (overall similarity, criteria
+        similarities array, best matching section per criterion or None,
+        resume embedding, (section, embedding) per chunk or None)
+    """
+    # Texts to embed for each resume: its chunks, or the whole cleaned text
+    pieces = []
+    for resume_text, sections, resume_clean in zip(resume_texts, resume_sections, resume_cleans):
+        chunks = chunk_resume(resume_text, sections=sections) if chunked else []
+        pieces.append(chunks or [(None, resume_clean)])
+    
+    embeddings, job_embeddings = embed_batch(
+        [text for chunks in pieces for _, text in chunks],
+        [job_clean] + criteria_clean
+    )
+    
+    results = []
+    offset = 0
+    for chunks in pieces:
+        chunk_embeddings = embeddings[offset:offset + len(chunks)]
+        offset += len(chunks)
+        
+        if chunks[0][0] is None:
+            # Whole resume: every similarity comes from a single matrix product
+            similarities = job_embeddings @ chunk_embeddings[0]
+            results.append((float(similarities[0]), similarities[1:], None, chunk_embeddings[0], None))
+            continue
+        
+        # Chunked resume: build a chunk x (job + criteria) matrix
+        matrix = chunk_embeddings @ job_embeddings.T
+        
+        # The mean of the chunk embeddings stands in for the whole resume
+        resume_embedding = chunk_embeddings.mean(axis=0)
+        resume_embedding /= max(np.linalg.norm(resume_embedding), 1e-12)
+        overall_similarity = float(job_embeddings[0] @ resume_embedding)
+        
+        # Pool each criterion's column over the chunks
+        criteria_matrix = matrix[:, 1:]
+        if pooling == 'mean':
+            similarities = criteria_matrix.mean(axis=0)
+        else:
+            similarities = criteria_matrix.max(axis=0)
+        sections = [chunks[i][0] for i in criteria_matrix.argmax(axis=0)]
+        
+        chunk_records = [(section, embedding) for (section, _), embedding in zip(chunks, chunk_embeddings)]
+        results.append((overall_similarity, similarities, sections, resume_embedding, chunk_records))
+    
+    return results
+
 def semantic_similarity(text1, text2):
     """Calculate semantic similarity between two texts."""
-    # Get embeddings
-    embedding1 = get_embedding(text1)
-    embedding2 = get_embedding(text2)
-    
-    # Reshape for cosine_similarity
-    embedding1 = embedding1.reshape(1, -1)
-    embedding2 = embedding2.reshape(1, -1)
+    # Get both embeddings in one batch
+    embeddings = embed_texts([preprocess_text(text1), preprocess_text(text2)])
     
     # Calculate cosine similarity
-    similarity = cosine_similarity(embedding1, embedding2)[0][0]
+    similarity = float(np.dot(embeddings[0], embeddings[1]))
     
     return similarity
 
-def extract_education(text):
+def extract_education(text, doc=None):
     """Extract education information using NLP."""
     education_keywords = [
         'bachelor', 'master', 'phd', 'doctorate', 'degree', 'diploma',
@@ -108,7 +337,8 @@ def extract_education(text):
         'university', 'college', 'institute', 'school'
     ]
     
-    doc = nlp(text)
+    if doc is None:
+        doc = parse_doc(text, ['sentences', 'entities'])
     education_info = []
     
     # Extract sentences containing education keywords
@@ -144,39 +374,23 @@ def extract_experience_years(text):
     
     return max(years) if years else 0
 
-def extract_job_titles(text):
+def extract_job_titles(text, doc=None, titles_path=JOB_TITLES_PATH):
     """Extract potential job titles using NLP."""
-    common_titles = [
-        'engineer', 'developer', 'manager', 'director', 'analyst',
-        'specialist', 'consultant', 'coordinator', 'assistant',
-        'designer', 'architect', 'administrator', 'supervisor',
-        'lead', 'head', 'chief', 'officer', 'president', 'vp',
-        'vice president', 'executive', 'founder', 'co-founder'
-    ]
+    # Titles are matched word by word against a trie built from the titles file
+    title_index = get_title_index(titles_path)
     
-    doc = nlp(text)
+    if doc is None:
+        doc = parse_doc(text, ['sentences'])
     titles = []
     
-    # Look for job title patterns
+    # Look for job title patterns like "Senior Software Engineer" or "Marketing Manager"
     for sent in doc.sents:
-        sent_text = sent.text.lower()
-        
-        # Check for common title patterns
-        for title in common_titles:
-            # Look for patterns like "Senior Software Engineer" or "Marketing Manager"
-            title_pattern = r'(?i)(?:^|\s)(?:senior|junior|principal|associate|assistant|lead|chief|head)?\s*(?:\w+\s+)*' + re.escape(title) + r'(?:\s+\w+)*(?:$|\s)'
-            matches = re.findall(title_pattern, sent_text)
-            titles.extend([match.strip() for match in matches if match.strip()])
+        titles.extend(find_titles(sent.text.lower(), title_index))
     
     # Remove duplicates while preserving order
-    unique_titles = []
-    for title in titles:
-        if title not in unique_titles:
-            unique_titles.append(title)
-    
-    return unique_titles
+    return list(dict.fromkeys(titles))
 
-def analyze_resume(resume_text, job_description, criteria_list):
+def analyze_resume(resume_text, job_description, criteria_list, chunked=None, pooling=CHUNK_POOLING):
     """
     Analyze a resume against a job description using NLP techniques.
     
@@ -184,49 +398,114 @@ def analyze_resume(resume_text, job_description, criteria_list):
         resume_text: The full text of the resume
         job_description: The full text of the job description
         criteria_list: List of criteria to match against
+        chunked: Embed the resume as section-aware token windows instead of
+            one truncated string (defaults to CHUNKED_EMBEDDINGS)
+        pooling: How chunk similarities become a criterion score ('max' or 'mean')
         
     Returns:
         A dictionary containing analysis results
     """
-    # Preprocess texts
-    resume_clean = preprocess_text(resume_text)
-    job_clean = preprocess_text(job_description)
-    
-    # Calculate overall semantic similarity
-    overall_similarity = semantic_similarity(resume_clean, job_clean)
-    
-    # Extract skills (assuming criteria_list contains skills)
-    skills = extract_skills(resume_clean, criteria_list)
-    
-    # Extract education information
-    education = extract_education(resume_clean)
+    return analyze_resumes([resume_text], job_description, criteria_list, chunked, pooling)[0]
+
+def analyze_resumes(resume_texts, job_description, criteria_list, chunked=None, pooling=CHUNK_POOLING,
+                    batch_size=SPACY_BATCH_SIZE, return_embeddings=False, resume_sections=None):
+    """
+    Analyze many resumes against one job description.
     
-    # Extract years of experience
-    experience_years = extract_experience_years(resume_clean)
+    The encoder and spaCy each see the whole list at once, in batches,
+    instead of one resume at a time.
     
-    # Extract job titles
-    job_titles = extract_job_titles(resume_clean)
+    Args:
+        resume_texts: The full texts of the resumes
+        job_description: The full text of the job description
+        criteria_list: List of criteria to match against
+        chunked: Embed resumes as section-aware token windows instead of
+            one truncated string (defaults to CHUNKED_EMBEDDINGS)
+        pooling: How chunk similarities become a criterion score ('max' or 'mean')
+        batch_size: Number of resumes per nlp.pipe batch
+        return_embeddings: Also return each resume's embedding record
+        resume_sections: The section line spans parse_resume found in each
+            resume, reused for chunking; any missing are segmented again
+        
+    Returns:
+        A list with the analyze_resume results of each resume, in order, or
+        with return_embeddings a tuple of (results, embedding records) where
+        each record holds the encoder id, EMBEDDING_VERSION, the resume
+        vector and any (section, vector) chunk embeddings
+    """
+    resume_texts = list(resume_texts)
+    if not resume_texts:
+        return ([], []) if return_embeddings else []
+    if resume_sections is None:
+        resume_sections = [None] * len(resume_texts)
     
-    # Calculate criteria-specific similarities
-    criteria_similarities = []
-    for criterion in criteria_list:
-        similarity = semantic_similarity(criterion, resume_clean)
-        criteria_similarities.append({
-            'criterion': criterion,
-            'similarity': similarity
+    # Preprocess texts
+    resume_cleans = [preprocess_text(resume_text) for resume_text in resume_texts]
+    job_clean = preprocess_text(job_description)
+    criteria_clean = [preprocess_text(criterion) for criterion in criteria_list]
+    
+    if chunked is None:
+        chunked = CHUNKED_EMBEDDINGS
+    
+    # Calculate overall and criteria-specific semantic similarity
+    similarity_results = _resume_similarities(
+        resume_texts, resume_sections, resume_cleans, job_clean, criteria_clean, chunked, pooling
+    )
+    
+    # Run spaCy once per resume and share each Doc between the extractors
+    docs = parse_docs(resume_cleans, batch_size=batch_size)
+    
+    results = []
+    embedding_records = []
+    model_id = get_encoder_id()
+    for resume_clean, doc, (overall_similarity, similarities, sections, resume_embedding, chunk_records) in zip(
+        resume_cleans, docs, similarity_results
+    ):
+        # Extract skills (assuming criteria_list contains skills)
+        skills = extract_skills(resume_clean, criteria_list, doc=doc)
+        
+        # Extract education information
+        education = extract_education(resume_clean, doc=doc)
+        
+        # Extract years of experience
+        experience_years = extract_experience_years(resume_clean)
+        
+        # Extract job titles
+        job_titles = extract_job_titles(resume_clean, doc=doc)
+        
+        # Calculate criteria-specific similarities
+        criteria_similarities = []
+        for i, (criterion, similarity) in enumerate(zip(criteria_list, similarities)):
+            match = {
+                'criterion': criterion,
+                'similarity': float(similarity)
+            }
+            # Section of the resume that matched the criterion best
+            if sections:
+                match['section'] = sections[i]
+            criteria_similarities.append(match)
+        
+        # Sort criteria similarities by score
+        criteria_similarities.sort(key=lambda x: x['similarity'], reverse=True)
+        
+        # Prepare results
+        results.append({
+            'overall_similarity': overall_similarity,
+            'skills_matched': skills,
+            'education': education,
+            'experience_years': experience_years,
+            'job_titles': job_titles,
+            'criteria_matches': criteria_similarities
+        })
+        
+        # Kept out of the results, which are stored as JSON
+        embedding_records.append({
+            'model': model_id,
+            'version': EMBEDDING_VERSION,
+            'vector': resume_embedding,
+            'chunks': chunk_records or []
         })
     
-    # Sort criteria similarities by score
-    criteria_similarities.sort(key=lambda x: x['similarity'], reverse=True)
-    
-    # Prepare results
-    results = {
-        'overall_similarity': overall_similarity,
-        'skills_matched': skills,
-        'education': education,
-        'experience_years': experience_years,
-        'job_titles': job_titles,
-        'criteria_matches': criteria_similarities
-    }
-    
+    if return_embeddings:
+        return results, embedding_records
     return results
@@ -1,61 +1,168 @@
+import csv
 import re
+import yaml
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
 from dateutil import parser
+from utils.caching import get_compiled
+
+# Month-name dates, numeric day/month/year dates and ISO-style dates,
+# combined into one pattern so the text is scanned once
+DATE_REGEX = re.compile(
+    r'\b(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)[.,]?\s+\d{4}\b'
+    r'|\b\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}\b'
+    r'|\b\d{4}[/.-]\d{1,2}[/.-]\d{1,2}\b'
+)
+
+# Number of distinct date strings whose parse is remembered
+DATE_CACHE_SIZE = 4096
+
+# Fixed default for fields a date string leaves out, so a string always
+# parses the same way and can be cached
+DEFAULT_DATE = datetime(2000, 1, 1)
+
+# Skill synonym table: a YAML or CSV file of aliases for canonical skill names
+SKILL_SYNONYMS_PATH = Path("assets/skill_synonyms.yaml")
+
+# Used when the synonyms file is missing
+DEFAULT_SKILL_SYNONYMS = {
+    'ms office': 'microsoft office',
+    'ms word': 'microsoft word',
+    'ms excel': 'microsoft excel',
+    'ms powerpoint': 'microsoft powerpoint',
+    'react.js': 'react',
+    'reactjs': 'react',
+    'node.js': 'node',
+    'nodejs': 'node',
+    'vue.js': 'vue',
+    'vuejs': 'vue',
+    'angular.js': 'angular',
+    'angularjs': 'angular',
+    'js': 'javascript',
+    'py': 'python',
+    'c#': 'csharp',
+    'c++': 'cplusplus',
+    'aws': 'amazon web services',
+    'gcp': 'google cloud platform',
+    'azure': 'microsoft azure',
+    'ml': 'machine learning',
+    'ai': 'artificial intelligence',
+    'dl': 'deep learning',
+    'nlp': 'natural language processing',
+    'cv': 'computer vision'
+}
+
+# (modification time, compiled synonym table) per synonyms file
+_skill_normalizers = {}
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(date_str):
+    """Parse a date string to YYYY-MM, or return None if it is not a date."""
+    try:
+        return parser.parse(date_str, fuzzy=True, default=DEFAULT_DATE).strftime('%Y-%m')
+    except (ValueError, OverflowError):
+        return None
+
+def normalize_dates_with_spans(text):
+    """
+    Normalize dates in text to YYYY-MM format in a single pass.
+    
+    Returns:
+        A tuple of (normalized text, list of (start, end, YYYY-MM) spans of
+        the dates found in the original text)
+    """
+    spans = []
+    
+    def replace(match):
+        normalized_date = parse_date(match.group())
+        if normalized_date is None:
+            return match.group()
+        spans.append((match.start(), match.end(), normalized_date))
+        return normalized_date
+    
+    return DATE_REGEX.sub(replace, text), spans
 
 def normalize_dates(text):
     """Normalize dates in text to YYYY-MM format."""
-    # Find date patterns
-    date_patterns = [
-        r'\b(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)[.,]?\s+\d{4}\b',
-        r'\b\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}\b',
-        r'\b\d{4}[/.-]\d{1,2}[/.-]\d{1,2}\b'
-    ]
-    
-    normalized_text = text
-    
-    for pattern in date_patterns:
-        dates = re.findall(pattern, text)
-        for date_str in dates:
-            try:
-                parsed_date = parser.parse(date_str, fuzzy=True)
-                normalized_date = parsed_date.strftime('%Y-%m')
-                normalized_text = normalized_text.replace(date_str, normalized_date)
-            except:
-                pass
-    
-    return normalized_text
-
-def normalize_skills(text):
-    """Normalize skill names in text."""
-    skill_mapping = {
-        'ms office': 'microsoft office',
-        'ms word': 'microsoft word',
-        'ms excel': 'microsoft excel',
-        'ms powerpoint': 'microsoft powerpoint',
-        'react.js': 'react',
-        'reactjs': 'react',
-        'node.js': 'node',
-        'nodejs': 'node',
-        'vue.js': 'vue',
-        'vuejs': 'vue',
-        'angular.js': 'angular',
-        'angularjs': 'angular',
-        'js': 'javascript',
-        'py': 'python',
-        'c#': 'csharp',
-        'c++': 'cplusplus',
-        'aws': 'amazon web services',
-        'gcp': 'google cloud platform',
-        'azure': 'microsoft azure',
-        'ml': 'machine learning',
-        'ai': 'artificial intelligence',
-        'dl': 'deep learning',
-        'nlp': 'natural language processing',
-        'cv': 'computer vision'
-    }
+    return normalize_dates_with_spans(text)[0]
+
+def load_skill_synonyms(path=SKILL_SYNONYMS_PATH):
+    """
+    Read a skill synonym table from a YAML or CSV file.
     
-    normalized_text = text.lower()
+    YAML files map each canonical skill to a list of aliases; CSV files have
+    'canonical' and 'alias' columns with one alias per row.
     
-    for skill, normalized_skill in skill_mapping.items():
-        normalized_text = re.sub(r'\b' + re.escape(skill) + r'\b', normalized_skill, normalized_text)
+    Returns:
+        A dictionary mapping each lowercased alias to its canonical skill
+    """
+    path = Path(path)
+    synonyms = {}
+    
+    with open(path, encoding='utf-8', newline='') as f:
+        if path.suffix.lower() == '.csv':
+            for row in csv.DictReader(f):
+                synonyms.setdefault(row['alias'].strip().lower(), row['canonical'].strip().lower())
+        else:
+            for canonical, aliases in (yaml.safe_load(f) or {}).items():
+                for alias in aliases or []:
+                    synonyms.setdefault(str(alias).strip().lower(), str(canonical).strip().lower())
+    
+    synonyms.pop('', None)
+    return synonyms
+
+def _trie_pattern(node):
+    """Build a regex from a character trie, preferring the longest match."""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    if len(branches) == 1 and '' not in node:
+        return branches[0]
+    
+    pattern = '(?:' + '|'.join(branches) + ')'
+    # A term can end here, so the longer continuations are optional
+    return pattern + '?' if '' in node else pattern
+
+def compile_skill_synonyms(synonyms):
+    """
+    Compile a synonym table into one regex over all aliases.
+    
+    Canonical names map to themselves, so text that is already normalized is
+    left alone rather than having an alias inside it rewritten.
+    
+    Returns:
+        A tuple of (compiled regex, dictionary mapping every term to its
+        canonical skill)
+    """
+    mapping = {canonical: canonical for canonical in synonyms.values()}
+    mapping.update(synonyms)
+    
+    trie = {}
+    for term in mapping:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    
+    # Whole words only, including aliases such as c++ that end in symbols
+    regex = re.compile(r'(?<!\w)' + _trie_pattern(trie) + r'(?!\w)') if mapping else None
+    return regex, mapping
+
+def get_skill_normalizer(path=SKILL_SYNONYMS_PATH):
+    """Return the compiled synonym table for a file, recompiling it if the file changed."""
+    return get_compiled(
+        _skill_normalizers,
+        path,
+        lambda path: compile_skill_synonyms(load_skill_synonyms(path) if path else DEFAULT_SKILL_SYNONYMS)
+    )
+
+def normalize_skills(text, synonyms_path=SKILL_SYNONYMS_PATH):
+    """Normalize skill names in text in a single pass."""
+    regex, mapping = get_skill_normalizer(synonyms_path)
+    
+    normalized_text = text.lower()
+    if regex is None:
+        return normalized_text
     
-    return normalized_text
+    return regex.sub(lambda match: mapping[match.group()], normalized_text)
@@ -0,0 +1,229 @@
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+from pathlib import Path
+
+# Where the exported and quantized encoder is stored
+ONNX_MODEL_DIR = Path("models/onnx")
+ONNX_MODEL_FILE = "model.int8.onnx"
+ONNX_CONFIG_FILE = "encoder_config.json"
+
+# Number of texts per inference batch
+ONNX_BATCH_SIZE = 32
+
+# Texts used to compare the ONNX encoder with the PyTorch reference
+PARITY_TEXTS = [
+    "senior software engineer with 8 years of python and aws experience",
+    "bachelor of science in electrical engineering university of washington",
+    "embedded firmware development for ble and wifi iot devices",
+    "managed a team of five analysts building sales dashboards in tableau",
+    "water quality monitoring sensors and laboratory chemistry",
+    "excellent communication skills",
+    "machine learning natural language processing pytorch transformers",
+    "project manager pmp certified agile scrum"
+]
+
+class OnnxSentenceEncoder:
+    """
+    A sentence-transformers model run through ONNX Runtime with int8 weights.
+
+    Provides the parts of the SentenceTransformer interface the app uses:
+    encode(), tokenizer and max_seq_length.
+    """
+
+    backend = 'onnx-int8'
+
+    def __init__(self, model_dir=ONNX_MODEL_DIR):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = Path(model_dir)
+        with open(model_dir / ONNX_CONFIG_FILE) as f:
+            config = json.load(f)
+
+        self.model_name = config['model_name']
+        self.max_seq_length = config['max_seq_length']
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            str(model_dir / ONNX_MODEL_FILE),
+            options,
+            providers=['CPUExecutionProvider']
+        )
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def encode(self, sentences, batch_size=ONNX_BATCH_SIZE, normalize_embeddings=False, **kwargs):
+        """Embed one text or a list of texts with mean pooling."""
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        # Batch texts of similar length together to reduce padding
+        order = np.argsort([-len(sentence) for sentence in sentences], kind='stable')
+        embeddings = [None] * len(sentences)
+
+        for start in range(0, len(sentences), batch_size):
+            indices = order[start:start + batch_size]
+            features = self.tokenizer(
+                [sentences[i] for i in indices],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors='np'
+            )
+            inputs = {name: features[name].astype(np.int64) for name in self.input_names}
+            token_embeddings = self.session.run(None, inputs)[0]
+
+            # Mean pooling over the real (unpadded) tokens
+            mask = features['attention_mask'][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+            for i, embedding in zip(indices, pooled):
+                embeddings[i] = embedding
+
+        embeddings = np.array(embeddings, dtype=np.float32)
+        if normalize_embeddings and len(embeddings):
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+
+        return embeddings[0] if single else embeddings
+
+def export_quantized_encoder(reference, model_name, model_dir=ONNX_MODEL_DIR):
+    """
+    Export a loaded SentenceTransformer to ONNX and quantize its weights to int8.
+
+    Only mean-pooled models without extra layers are supported, which covers
+    the MiniLM paraphrase models. The export is written to a staging
+    directory and moved into place in one step, so model_dir only ever holds
+    a complete export.
+    """
+    if len(reference) != 2 or reference[1].get_pooling_mode_str() != 'mean':
+        raise ValueError(f"Unsupported sentence-transformers architecture for ONNX export: {model_name}")
+
+    model_dir = Path(model_dir)
+    model_dir.parent.mkdir(parents=True, exist_ok=True)
+    staging_dir = Path(tempfile.mkdtemp(prefix=f".{model_dir.name}-", dir=model_dir.parent))
+    try:
+        _export_to(reference, model_name, staging_dir)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    # A directory cannot replace a non-empty one, so move any old export aside
+    old_dir = staging_dir.with_name(staging_dir.name + "-old")
+    if model_dir.exists():
+        os.replace(model_dir, old_dir)
+    os.replace(staging_dir, model_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+def _export_to(reference, model_name, model_dir):
+    """Write the quantized model, tokenizer and config into model_dir."""
+    import torch
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    fp32_path = model_dir / "model.onnx"
+
+    class TokenEmbeddings(torch.nn.Module):
+        """Wraps the transformer so the exported graph returns token embeddings."""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids,
+                return_dict=False
+            )[0]
+
+    tokenizer = reference.tokenizer
+    sample = tokenizer(["export sample"], return_tensors='pt')
+    input_names = ['input_ids', 'attention_mask', 'token_type_ids']
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['token_embeddings'] = {0: 'batch', 1: 'sequence'}
+
+    wrapper = TokenEmbeddings(reference[0].auto_model).eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper,
+            tuple(sample[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=['token_embeddings'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+    quantize_dynamic(str(fp32_path), str(model_dir / ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    fp32_path.unlink()
+
+    tokenizer.save_pretrained(str(model_dir))
+    with open(model_dir / ONNX_CONFIG_FILE, 'w') as f:
+        json.dump({'model_name': model_name, 'max_seq_length': reference.max_seq_length}, f)
+
+@contextmanager
+def _export_lock(model_dir):
+    """Hold an exclusive lock on exporting to model_dir, across processes."""
+    import fcntl
+
+    model_dir.parent.mkdir(parents=True, exist_ok=True)
+    with open(model_dir.parent / f".{model_dir.name}.lock", 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def ensure_exported(load_reference, model_name, model_dir=ONNX_MODEL_DIR):
+    """
+    Export the model unless a quantized export of it already exists.
+
+    Safe to call from several processes at once, e.g. pool workers starting
+    together: one exports while the others wait for it and then reuse its
+    export.
+
+    Args:
+        load_reference: Callable returning the SentenceTransformer to export,
+            only called if an export is needed
+    """
+    model_dir = Path(model_dir)
+    if is_exported(model_name, model_dir):
+        return
+
+    with _export_lock(model_dir):
+        # Another process may have exported it while we waited
+        if not is_exported(model_name, model_dir):
+            export_quantized_encoder(load_reference(), model_name, model_dir)
+
+def is_exported(model_name, model_dir=ONNX_MODEL_DIR):
+    """Return True if a quantized export of the model exists."""
+    config_path = Path(model_dir) / ONNX_CONFIG_FILE
+    if not config_path.exists() or not (Path(model_dir) / ONNX_MODEL_FILE).exists():
+        return False
+    with open(config_path) as f:
+        return json.load(f).get('model_name') == model_name
+
+def check_encoder_parity(reference, encoder, texts=PARITY_TEXTS):
+    """
+    Compare the ONNX encoder's embeddings with the PyTorch reference.
+
+    Returns:
+        A dictionary with the mean and minimum cosine similarity between the
+        two backends' embeddings and the maximum cosine drift (1 - minimum)
+    """
+    expected = reference.encode(list(texts), normalize_embeddings=True)
+    actual = encoder.encode(list(texts), normalize_embeddings=True)
+    cosines = np.sum(expected * actual, axis=1)
+
+    return {
+        'texts': len(texts),
+        'mean_cosine': float(cosines.mean()),
+        'min_cosine': float(cosines.min()),
+        'max_drift': float(1 - cosines.min())
+    }
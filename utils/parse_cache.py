@@ -0,0 +1,104 @@
+import sqlite3
+import hashlib
+import json
+import time
+from pathlib import Path
+from utils.caching import connect_cache_db
+
+# Cache database file path
+CACHE_DB_PATH = Path("data/parse_cache.db")
+
+# Maximum total size of cached parse results before the least recently
+# used entries are evicted
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+# Read size used when hashing files
+HASH_CHUNK_SIZE = 1024 * 1024
+
+CACHE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS parse_cache (
+        sha256 TEXT NOT NULL,
+        parser_version INTEGER NOT NULL,
+        parsed TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        last_access REAL NOT NULL,
+        PRIMARY KEY (sha256, parser_version)
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_parse_cache_last_access ON parse_cache (last_access)"
+]
+
+def _connect():
+    """Open the cache database, creating it if needed."""
+    return connect_cache_db(CACHE_DB_PATH, CACHE_SCHEMA)
+
+def file_sha256(file_path):
+    """Return the SHA-256 hex digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def get_cached_parse(sha256, parser_version):
+    """Return the cached parse result for a file hash, or None on a miss."""
+    try:
+        conn = _connect()
+        row = conn.execute(
+            "SELECT parsed FROM parse_cache WHERE sha256 = ? AND parser_version = ?",
+            (sha256, parser_version)
+        ).fetchone()
+
+        if row:
+            conn.execute(
+                "UPDATE parse_cache SET last_access = ? WHERE sha256 = ? AND parser_version = ?",
+                (time.time(), sha256, parser_version)
+            )
+            conn.commit()
+
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"Error reading parse cache: {e}")
+        return None
+
+    return json.loads(row[0]) if row else None
+
+def put_cached_parse(sha256, parser_version, parsed_data):
+    """Store a parse result and evict old entries if the cache is too large."""
+    payload = json.dumps(parsed_data)
+
+    try:
+        conn = _connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO parse_cache (sha256, parser_version, parsed, size, last_access) VALUES (?, ?, ?, ?, ?)",
+            (sha256, parser_version, payload, len(payload), time.time())
+        )
+        _evict(conn)
+        conn.commit()
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"Error writing parse cache: {e}")
+
+def _evict(conn):
+    """Delete least recently used entries until the cache fits MAX_CACHE_BYTES."""
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM parse_cache").fetchone()[0]
+    if total <= MAX_CACHE_BYTES:
+        return
+
+    rows = conn.execute("SELECT sha256, parser_version, size FROM parse_cache ORDER BY last_access").fetchall()
+    stale = []
+    for sha256, parser_version, size in rows:
+        if total <= MAX_CACHE_BYTES:
+            break
+        stale.append((sha256, parser_version))
+        total -= size
+
+    conn.executemany("DELETE FROM parse_cache WHERE sha256 = ? AND parser_version = ?", stale)
+
+def clear_parse_cache():
+    """Remove all cached parse results."""
+    conn = _connect()
+    conn.execute("DELETE FROM parse_cache")
+    conn.commit()
+    conn.close()
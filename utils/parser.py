@@ -1,30 +1,76 @@
 import pdfplumber
-import re
 import os
-from pathlib import Path
 import docx
-import tempfile
+from utils.blobstore import store_upload
+from utils.docx_reader import extract_docx_text
+from utils.contact import scan_contact_fields
+from utils.sections import segment_sections, get_section
+from utils.parse_cache import file_sha256, get_cached_parse, put_cached_parse
 
-# Regular expressions for extracting information
-EMAIL_REGEX = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-PHONE_REGEX = r'(\+\d{1,3}[-.\s]?)?($$?\d{3}$$?[-.\s]?)?\d{3}[-.\s]?\d{4}'
-EDUCATION_KEYWORDS = ['education', 'university', 'college', 'bachelor', 'master', 'phd', 'degree']
-EXPERIENCE_KEYWORDS = ['experience', 'work', 'employment', 'job', 'career']
-SKILLS_KEYWORDS = ['skills', 'technologies', 'tools', 'languages', 'frameworks']
+# Bump when extraction or parsing changes so cached parse results are refreshed
+PARSER_VERSION = 5
 
-def extract_text_from_pdf(file_path):
+# Per-document limits so very long PDFs keep memory use flat
+MAX_PDF_PAGES = 40
+MAX_PDF_CHARS = 200000
+
+# Tighter limits for the cheap fallback extractor used after a parse was
+# killed for exceeding its time or memory budget
+FALLBACK_PDF_PAGES = 10
+FALLBACK_PDF_CHARS = 50000
+
+def iter_pdf_pages(file_path, max_pages=MAX_PDF_PAGES, max_chars=MAX_PDF_CHARS, simple=False):
+    """Yield the text of each PDF page, stopping at the page and character limits.
+
+    With simple=True pages are read with extract_text_simple, which skips
+    pdfplumber's layout analysis.
+    """
+    total_chars = 0
+    
+    # Only build Page objects up to the page cap
+    with pdfplumber.open(file_path, pages=range(1, max_pages + 1)) as pdf:
+        for page_number, page in enumerate(pdf.pages, start=1):
+            # A single bad page should not drop the whole resume
+            try:
+                page_text = (page.extract_text_simple() if simple else page.extract_text()) or ""
+            except Exception as e:
+                print(f"Error extracting text from PDF page {page_number}: {e}")
+                page_text = ""
+            finally:
+                # Release the page's cached layout objects and text map
+                # before moving on; pdf.pages keeps a reference to every page
+                page.close()
+            
+            remaining = max_chars - total_chars
+            if len(page_text) >= remaining:
+                yield page_text[:remaining]
+                break
+            
+            total_chars += len(page_text)
+            yield page_text
+
+def extract_text_from_pdf(file_path, fallback=False):
     """Extract text from a PDF file."""
-    text = ""
+    if fallback:
+        page_iter = iter_pdf_pages(file_path, FALLBACK_PDF_PAGES, FALLBACK_PDF_CHARS, simple=True)
+    else:
+        page_iter = iter_pdf_pages(file_path)
+    
+    pages = []
     try:
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
+        for page_text in page_iter:
+            pages.append(page_text)
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
-    return text
+    return "\n".join(pages)
 
 def extract_text_from_docx(file_path):
     """Extract text from a DOCX file."""
+    try:
+        return extract_docx_text(file_path)
+    except Exception as e:
+        print(f"Error streaming text from DOCX, falling back to python-docx: {e}")
+    
     text = ""
     try:
         doc = docx.Document(file_path)
@@ -34,116 +80,84 @@ def extract_text_from_docx(file_path):
         print(f"Error extracting text from DOCX: {e}")
     return text
 
-def extract_text_from_file(file_path):
-    """Extract text from a file based on its extension."""
+def extract_text_from_file(file_path, fallback=False):
+    """Extract text from a file based on its extension.
+
+    With fallback=True only the cheapest extractors are used.
+    """
     ext = os.path.splitext(file_path)[1].lower()
     if ext == '.pdf':
-        return extract_text_from_pdf(file_path)
+        return extract_text_from_pdf(file_path, fallback=fallback)
     elif ext == '.docx':
+        if fallback:
+            try:
+                return extract_docx_text(file_path)
+            except Exception as e:
+                print(f"Error streaming text from DOCX: {e}")
+                return ""
         return extract_text_from_docx(file_path)
     else:
         return ""
 
 def extract_email(text):
     """Extract email from text."""
-    emails = re.findall(EMAIL_REGEX, text)
-    return emails[0] if emails else ""
+    return scan_contact_fields(text)['email']
 
 def extract_phone(text):
     """Extract phone number from text."""
-    phones = re.findall(PHONE_REGEX, text)
-    if phones:
-        # Join the parts of the phone number
-        phone = ''.join(''.join(part) for part in phones[0] if part)
-        return phone
-    return ""
-
-def extract_section(text, keywords, next_section_keywords=None):
-    """Extract a section from text based on keywords."""
-    lines = text.split('\n')
-    section_text = ""
-    in_section = False
-    
-    for line in lines:
-        line_lower = line.lower()
-        
-        # Check if we're entering the section
-        if not in_section:
-            for keyword in keywords:
-                if keyword in line_lower:
-                    in_section = True
-                    section_text += line + "\n"
-                    break
-        
-        # Check if we're exiting the section
-        elif next_section_keywords:
-            should_exit = False
-            for keyword in next_section_keywords:
-                if keyword in line_lower:
-                    should_exit = True
-                    break
-            
-            if should_exit:
-                break
-            else:
-                section_text += line + "\n"
-        
-        # If we're in the section and not checking for next section
-        elif in_section:
-            section_text += line + "\n"
-    
-    return section_text.strip()
+    return scan_contact_fields(text)['phone']
 
 def extract_name(text):
     """Extract name from the beginning of the resume."""
-    lines = text.split('\n')
-    for line in lines[:5]:  # Check first 5 lines
-        line = line.strip()
-        if line and not re.search(EMAIL_REGEX, line) and not re.search(PHONE_REGEX, line):
-            # Exclude lines that are too long or contain common headers
-            if len(line) < 50 and not any(keyword in line.lower() for keyword in ['resume', 'cv', 'curriculum']):
-                return line
-    return ""
+    return scan_contact_fields(text)['name']
 
-def parse_resume(file_path):
-    """Parse a resume file and extract relevant information."""
+def parse_resume(file_path, use_cache=True, fallback=False):
+    """Parse a resume file and extract relevant information.
+
+    Fallback parses use the cheap extractors and are not cached.
+    """
+    # Return the cached result if this exact file has been parsed before
+    sha256 = None
+    if use_cache:
+        sha256 = file_sha256(file_path)
+        cached = get_cached_parse(sha256, PARSER_VERSION)
+        if cached:
+            return cached
+    
     # Extract text from file
-    text = extract_text_from_file(file_path)
+    text = extract_text_from_file(file_path, fallback=fallback)
     if not text:
         return None
     
-    # Extract basic information
-    name = extract_name(text)
-    email = extract_email(text)
-    phone = extract_phone(text)
+    # Extract basic information in a single scan
+    contact = scan_contact_fields(text)
     
-    # Extract sections
-    all_keywords = EDUCATION_KEYWORDS + EXPERIENCE_KEYWORDS + SKILLS_KEYWORDS
-    education = extract_section(text, EDUCATION_KEYWORDS, all_keywords)
-    experience = extract_section(text, EXPERIENCE_KEYWORDS, all_keywords)
-    skills = extract_section(text, SKILLS_KEYWORDS, all_keywords)
+    # Extract sections from a single segmentation pass
+    lines = text.split('\n')
+    sections = segment_sections(lines)
+    education = get_section(lines, sections, 'education')
+    experience = get_section(lines, sections, 'experience')
+    skills = get_section(lines, sections, 'skills')
     
-    # Return parsed data
-    return {
-        'name': name,
-        'email': email,
-        'phone': phone,
+    parsed_data = {
+        'name': contact['name'],
+        'email': contact['email'],
+        'phone': contact['phone'],
+        'urls': contact['urls'],
         'education': education,
         'experience': experience,
         'skills': skills,
-        'full_text': text
+        'full_text': text,
+        'sections': sections
     }
-
-def save_uploaded_file(uploaded_file):
-    """Save an uploaded file to a temporary location and return the path."""
-    # Create a temporary file
-    temp_dir = Path("temp_uploads")
-    temp_dir.mkdir(exist_ok=True)
     
-    file_path = temp_dir / uploaded_file.name
+    if sha256 and not fallback:
+        put_cached_parse(sha256, PARSER_VERSION, parsed_data)
     
-    # Write the file
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-    
-    return str(file_path)
+    # Return parsed data
+    return parsed_data
+
+def save_uploaded_file(uploaded_file):
+    """Save an uploaded file to the resume store and return the path."""
+    _, file_path = store_upload(uploaded_file)
+    return file_path
@@ -0,0 +1,126 @@
+import multiprocessing
+import os
+import time
+from utils.parse_cache import file_sha256, get_cached_parse
+from utils.parser import parse_resume, PARSER_VERSION
+
+# Per-document limits for parsing in an isolated worker process
+PARSE_TIMEOUT_SECONDS = 60
+PARSE_MAX_RSS_MB = 1024
+
+# How often the parent checks on the worker
+POLL_INTERVAL = 0.1
+
+# Workers are started from a clean process rather than forked from the
+# caller, so they do not inherit its loaded models and their RSS reflects
+# only the parse. The fork server preloads just this module and the parser.
+WORKER_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+WORKER_PRELOAD = ['utils.sandbox']
+
+def get_worker_context():
+    """Return the multiprocessing context used for worker processes."""
+    context = multiprocessing.get_context(WORKER_START_METHOD)
+    if WORKER_START_METHOD == 'forkserver':
+        context.set_forkserver_preload(WORKER_PRELOAD)
+    return context
+
+def _parse_worker(conn, file_path, fallback):
+    """Worker process entry point: parse one file and send the result back."""
+    try:
+        conn.send(('ok', parse_resume(file_path, fallback=fallback)))
+    except Exception as e:
+        conn.send(('error', str(e)))
+    finally:
+        conn.close()
+
+def _rss_mb(pid):
+    """Return the resident set size of a process in MB, or None if unknown."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+def run_isolated_parse(file_path, fallback=False, timeout=PARSE_TIMEOUT_SECONDS, max_rss_mb=PARSE_MAX_RSS_MB):
+    """
+    Parse a resume in a separate process with wall-clock and memory limits.
+
+    Returns:
+        A (parsed data, failure reason) tuple. The reason is None on success;
+        otherwise the worker was killed or failed and parsed data is None.
+    """
+    context = get_worker_context()
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(target=_parse_worker, args=(child_conn, file_path, fallback))
+    process.start()
+    child_conn.close()
+
+    started = time.monotonic()
+    reason = None
+    message = None
+
+    try:
+        while True:
+            # Receive before joining so a large result cannot block the worker
+            if parent_conn.poll(POLL_INTERVAL):
+                try:
+                    message = parent_conn.recv()
+                except EOFError:
+                    reason = f"worker exited with code {process.exitcode}"
+                break
+
+            if not process.is_alive() and not parent_conn.poll():
+                reason = f"worker exited with code {process.exitcode}"
+                break
+
+            if time.monotonic() - started > timeout:
+                reason = f"exceeded {timeout}s time limit"
+                break
+
+            rss = _rss_mb(process.pid)
+            if rss is not None and rss > max_rss_mb:
+                reason = f"exceeded {max_rss_mb} MB memory limit ({rss:.0f} MB)"
+                break
+    finally:
+        if process.is_alive() and reason:
+            process.kill()
+        process.join()
+        parent_conn.close()
+
+    if reason:
+        return None, reason
+
+    status, payload = message
+    if status == 'error':
+        return None, f"parse error: {payload}"
+
+    return payload, None
+
+def parse_resume_sandboxed(file_path, timeout=PARSE_TIMEOUT_SECONDS, max_rss_mb=PARSE_MAX_RSS_MB):
+    """
+    Parse a resume in an isolated worker, retrying with the fallback extractor.
+
+    Returns:
+        A (parsed data, incident) tuple. The incident is None when the normal
+        parse succeeded; otherwise it records why the document should be
+        quarantined and whether the fallback parse recovered it.
+    """
+    # Cached documents never need a worker
+    cached = get_cached_parse(file_sha256(file_path), PARSER_VERSION)
+    if cached:
+        return cached, None
+
+    parsed_data, reason = run_isolated_parse(file_path, timeout=timeout, max_rss_mb=max_rss_mb)
+    if reason is None:
+        return parsed_data, None
+
+    print(f"Parse of {file_path} failed ({reason}), retrying with fallback extractor")
+    parsed_data, fallback_reason = run_isolated_parse(file_path, fallback=True, timeout=timeout, max_rss_mb=max_rss_mb)
+
+    incident = {
+        'reason': reason,
+        'fallback_reason': fallback_reason,
+        'recovered': fallback_reason is None and parsed_data is not None
+    }
+    return parsed_data, incident
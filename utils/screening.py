@@ -1,6 +1,30 @@
 import re
+import numpy as np
 from utils.normalization import normalize_dates, normalize_skills
-from utils.nlp import analyze_resume, semantic_similarity, extract_skills, extract_experience_years
+from utils.skill_taxonomy import extract_taxonomy_skills
+from utils.nlp import (
+    analyze_resumes,
+    extract_experience_years,
+    get_criteria_matcher,
+    parse_docs,
+    preprocess_text
+)
+
+# A criterion is met when its similarity to the resume is above this
+SIMILARITY_THRESHOLD = 0.7
+
+# Points the overall similarity adds on top of the criteria weights
+OVERALL_SIMILARITY_BONUS = 10
+
+# Minimum percentage score to pass
+PASS_PERCENTAGE = 50
+
+# Number of best matched criteria listed in the summary
+TOP_MATCHES = 3
+
+# Stage that produced a screening result, saved with the candidate
+SCREENING_STAGE_PREFILTER = 'prefilter'
+SCREENING_STAGE_FULL = 'full'
 
 def extract_keywords(text, keywords):
     """Extract keywords from text and return a dictionary of keyword counts."""
@@ -19,75 +43,237 @@ def extract_years_of_experience(text):
     """Extract years of experience from text."""
     return extract_experience_years(text)
 
-def screen_candidate(candidate_data, criteria, job_description=""):
+def screen_candidate(candidate_data, criteria, job_description="", cascade=False):
     """Screen a candidate against criteria and return a score and summary."""
-    full_text = candidate_data['full_text']
-    education_text = candidate_data['education']
-    experience_text = candidate_data['experience']
-    skills_text = candidate_data['skills']
+    return screen_candidates([candidate_data], criteria, job_description, cascade)[0]
+
+def screen_candidates(candidates, criteria, job_description="", cascade=False):
+    """
+    Screen many candidates against the same criteria.
+    
+    The resumes are analyzed together with analyze_resumes, so the encoder
+    and spaCy batches are shared across the whole list, and the whole batch
+    is scored at once with score_candidates.
+    
+    With cascade=True, candidates are first checked for the job's required
+    criteria with prefilter_candidates, and only those that could still pass
+    go through the full NLP analysis. This skips the expensive stages for
+    most applicants to jobs with hard requirements, at the cost of
+    rejecting candidates who meet a required criterion only through
+    semantic similarity.
+    
+    Returns:
+        A list with the screen_candidate result of each candidate, in order;
+        'screening_stage' records which stage produced it
+    """
+    candidates = list(candidates)
     
     # Normalize dates and skills
-    normalized_text = normalize_dates(full_text)
-    normalized_text = normalize_skills(normalized_text)
+    normalized_texts = [
+        normalize_skills(normalize_dates(candidate_data['full_text'])).lower()
+        for candidate_data in candidates
+    ]
     
-    # Extract criteria texts
-    criteria_texts = criteria['criterion'].tolist()
+    results = [None] * len(candidates)
+    remaining = list(range(len(candidates)))
     
-    # Use NLP to analyze the resume
-    nlp_results = analyze_resume(full_text, job_description, criteria_texts)
+    if cascade:
+        missing_required = prefilter_candidates(
+            [candidate_data['full_text'] for candidate_data in candidates],
+            normalized_texts,
+            criteria
+        )
+        for i, missing in enumerate(missing_required):
+            if missing:
+                results[i] = _prefilter_result(candidates[i], missing)
+        remaining = [i for i in remaining if results[i] is None]
     
-    score = 0
-    max_score = 0
-    passed_criteria = []
-    failed_required_criteria = []
+    full_results = _screen_full(
+        [candidates[i] for i in remaining],
+        [normalized_texts[i] for i in remaining],
+        criteria,
+        job_description
+    )
+    for i, result in zip(remaining, full_results):
+        results[i] = result
     
-    # Extract years of experience
-    years_of_experience = nlp_results['experience_years']
+    return results
+
+def prefilter_candidates(resume_texts, normalized_texts, criteria):
+    """
+    Check resumes for a job's required criteria without embeddings.
     
-    # Screen against each criterion
-    for _, criterion in criteria.iterrows():
-        criterion_text = criterion['criterion'].lower()
-        weight = criterion['weight']
-        required = criterion['required']
-        
-        max_score += weight
+    A required criterion may be met if it appears verbatim in the normalized
+    resume, after the same skill normalization; otherwise a lemmas-only spaCy pass checks it with the criteria
+    matcher, for the resumes the keyword check could not clear.
+    
+    Args:
+        resume_texts: The full texts of the resumes
+        normalized_texts: The resumes after date and skill normalization, lowercased
+        criteria: Criteria DataFrame for the job
         
-        # Find the similarity score for this criterion
-        criterion_match = next((item for item in nlp_results['criteria_matches'] 
-                               if item['criterion'].lower() == criterion_text), None)
+    Returns:
+        A list with the required criteria each resume is missing, in order
+    """
+    required = criteria.loc[criteria['required'].astype(bool), 'criterion'].tolist()
+    
+    # Keyword check, with criteria normalized like the resumes so that
+    # e.g. "C++" matches the "cplusplus" the resume was rewritten to
+    required_normalized = [normalize_skills(criterion) for criterion in required]
+    missing_required = [
+        [criterion for criterion, criterion_normalized in zip(required, required_normalized)
+         if criterion_normalized not in normalized_text]
+        for normalized_text in normalized_texts
+    ]
+    
+    # Lemma check
+    unclear = [i for i, missing in enumerate(missing_required) if missing]
+    if unclear:
+        matcher = get_criteria_matcher(required)
+        docs = parse_docs([preprocess_text(resume_texts[i]) for i in unclear], ['lemmas'])
+        for i, doc in zip(unclear, docs):
+            found = set(matcher.match(doc))
+            missing_required[i] = [criterion for criterion in missing_required[i] if criterion not in found]
+    
+    return missing_required
+
+def _prefilter_result(candidate_data, missing_required):
+    """Build the result of a candidate rejected by the prefilter."""
+    summary = ["Rejected by the required-criteria prefilter"]
+    for criterion in missing_required:
+        summary.append(f"Missing required: {criterion}")
+    
+    return {
+        'score': 0.0,
+        'passed': False,
+        'summary': "\n".join(summary),
+        'nlp_results': None,
+        'embedding': None,
+        'skill_profile': extract_taxonomy_skills(candidate_data['full_text']),
+        'screening_stage': SCREENING_STAGE_PREFILTER
+    }
+
+def _screen_full(candidates, normalized_texts, criteria, job_description):
+    """Run the full NLP analysis and scoring over candidates."""
+    if not candidates:
+        return []
+    
+    # Extract criteria texts
+    criteria_texts = criteria['criterion'].tolist()
+    criteria_lower = [criterion_text.lower() for criterion_text in criteria_texts]
+    # Resumes are skill-normalized, so criteria must be too for exact matches
+    criteria_normalized = [normalize_skills(criterion_text) for criterion_text in criteria_texts]
+    
+    # Use NLP to analyze all resumes at once
+    all_nlp_results, embeddings = analyze_resumes(
+        [candidate_data['full_text'] for candidate_data in candidates],
+        job_description,
+        criteria_texts,
+        return_embeddings=True,
+        resume_sections=[candidate_data.get('sections') for candidate_data in candidates]
+    )
+    
+    # Build the candidates x criteria similarity and exact-match matrices
+    similarities = np.zeros((len(candidates), len(criteria_texts)))
+    exact_matches = np.zeros((len(candidates), len(criteria_texts)), dtype=bool)
+    
+    for i, (normalized_text, nlp_results) in enumerate(zip(normalized_texts, all_nlp_results)):
+        # criteria_matches is sorted best first, so keep the first of any duplicates
+        match_similarities = {}
+        for item in nlp_results['criteria_matches']:
+            match_similarities.setdefault(item['criterion'].lower(), item['similarity'])
         
-        similarity_score = criterion_match['similarity'] if criterion_match else 0
+        for j, criterion_text in enumerate(criteria_lower):
+            similarities[i, j] = match_similarities.get(criterion_text, 0)
+            exact_matches[i, j] = criteria_normalized[j] in normalized_text
+    
+    scoring = score_candidates(
+        similarities,
+        np.array([nlp_results['overall_similarity'] for nlp_results in all_nlp_results], dtype=float),
+        criteria['weight'].to_numpy(dtype=float),
+        criteria['required'].to_numpy(dtype=bool),
+        exact_matches
+    )
+    
+    results = []
+    for i, (nlp_results, embedding) in enumerate(zip(all_nlp_results, embeddings)):
+        results.append({
+            'score': float(scoring['score'][i]),
+            'passed': bool(scoring['passed'][i]),
+            'summary': _build_summary(
+                nlp_results,
+                [(criteria_texts[j], similarities[i, j]) for j in scoring['top_matches'][i]],
+                [(criteria_texts[j], similarities[i, j]) for j in np.flatnonzero(scoring['failed_required'][i])]
+            ),
+            'nlp_results': nlp_results,
+            # The resume vector and taxonomy skills are saved with the
+            # candidate, outside nlp_results
+            'embedding': embedding,
+            'skill_profile': extract_taxonomy_skills(candidates[i]['full_text']),
+            'screening_stage': SCREENING_STAGE_FULL
+        })
+    
+    return results
+
+def score_candidates(similarities, overall_similarities, weights, required, exact_matches,
+                     threshold=SIMILARITY_THRESHOLD, top_k=TOP_MATCHES):
+    """
+    Score a batch of candidates against a job's criteria.
+    
+    A criterion is met when it appears verbatim in the resume or its
+    similarity is above the threshold. Met criteria earn their weight, the
+    overall similarity adds up to OVERALL_SIMILARITY_BONUS points, and a
+    candidate passes with at least PASS_PERCENTAGE and no unmet required
+    criterion.
+    
+    Args:
+        similarities: Candidates x criteria similarity matrix
+        overall_similarities: Overall similarity of each candidate
+        weights: Weight of each criterion
+        required: Whether each criterion is required
+        exact_matches: Candidates x criteria matrix of verbatim matches
+        threshold: Similarity above which a criterion is met
+        top_k: Number of best met criteria to return per candidate
         
-        # Check if criterion is met (either by exact match or high similarity)
-        if criterion_text in normalized_text.lower() or similarity_score > 0.7:
-            score += weight
-            passed_criteria.append({
-                'criterion': criterion['criterion'],
-                'similarity': similarity_score
-            })
-        elif required:
-            failed_required_criteria.append({
-                'criterion': criterion['criterion'],
-                'similarity': similarity_score
-            })
-    
-    # Add bonus for overall similarity
-    overall_similarity_bonus = nlp_results['overall_similarity'] * 10
-    score += overall_similarity_bonus
-    max_score += 10  # Maximum possible bonus
-    
-    # Calculate percentage score
-    percentage_score = (score / max_score * 100) if max_score > 0 else 0
-    
-    # Determine if candidate passed
-    passed = len(failed_required_criteria) == 0 and percentage_score >= 50
-    
-    # Generate summary
+    Returns:
+        A dictionary with the percentage 'score' and 'passed' flag of each
+        candidate, the 'met' and 'failed_required' candidates x criteria
+        matrices, and 'top_matches', the indices of each candidate's best met
+        criteria by similarity (ties in criteria order)
+    """
+    similarities = np.asarray(similarities, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    required = np.asarray(required, dtype=bool)
+    
+    met = np.asarray(exact_matches, dtype=bool) | (similarities > threshold)
+    failed_required = ~met & required
+    
+    score = met.astype(float) @ weights + np.asarray(overall_similarities, dtype=float) * OVERALL_SIMILARITY_BONUS
+    max_score = weights.sum() + OVERALL_SIMILARITY_BONUS
+    percentage = score / max_score * 100 if max_score > 0 else np.zeros(len(score))
+    
+    passed = ~failed_required.any(axis=1) & (percentage >= PASS_PERCENTAGE)
+    
+    # Rank met criteria by similarity; unmet ones sort last
+    ranked = np.argsort(-np.where(met, similarities, -np.inf), axis=1, kind='stable')[:, :top_k]
+    top_matches = [row[met[i, row]] for i, row in enumerate(ranked)]
+    
+    return {
+        'score': percentage,
+        'passed': passed,
+        'met': met,
+        'failed_required': failed_required,
+        'top_matches': top_matches
+    }
+
+def _build_summary(nlp_results, top_matches, missing_required):
+    """Build a candidate's summary from the analysis and scored criteria."""
     summary = []
     
     # Add overall match percentage
     summary.append(f"Overall match: {nlp_results['overall_similarity']*100:.1f}%")
     
+    years_of_experience = nlp_results['experience_years']
     if years_of_experience > 0:
         summary.append(f"{years_of_experience} years of experience")
     
@@ -96,18 +282,12 @@ def screen_candidate(candidate_data, criteria, job_description=""):
         titles = nlp_results['job_titles'][:2]  # Take top 2 titles
         summary.append(f"Roles: {', '.join(titles)}")
     
-    # Add top 3 passed criteria with highest similarity
-    passed_criteria.sort(key=lambda x: x['similarity'], reverse=True)
-    for criterion in passed_criteria[:3]:
-        summary.append(f"Matches: {criterion['criterion']} ({criterion['similarity']*100:.1f}%)")
+    # Add top passed criteria with highest similarity
+    for criterion, similarity in top_matches:
+        summary.append(f"Matches: {criterion} ({similarity*100:.1f}%)")
     
     # Add failed required criteria
-    for criterion in failed_required_criteria:
-        summary.append(f"Missing required: {criterion['criterion']} ({criterion['similarity']*100:.1f}%)")
+    for criterion, similarity in missing_required:
+        summary.append(f"Missing required: {criterion} ({similarity*100:.1f}%)")
     
-    return {
-        'score': percentage_score,
-        'passed': passed,
-        'summary': "\n".join(summary),
-        'nlp_results': nlp_results
-    }
+    return "\n".join(summary)
@@ -0,0 +1,108 @@
+import re
+
+# Header phrases for each resume section. A line is a section header only if
+# the whole line is one of these phrases (optionally with a qualifier such as
+# "Technical" or "Professional" and trailing punctuation), so words like
+# "work" inside ordinary sentences no longer split sections.
+SECTION_HEADERS = {
+    'education': [
+        'education', 'academic background', 'academic qualifications',
+        'qualifications', 'academics', 'degrees', 'training'
+    ],
+    'experience': [
+        'experience', 'work history', 'employment history', 'employment',
+        'career history', 'professional background', 'work', 'positions held'
+    ],
+    'skills': [
+        'skills', 'technologies', 'tools', 'languages', 'frameworks',
+        'competencies', 'proficiencies', 'expertise', 'skill set', 'skillset'
+    ],
+    # Headers that end the sections above without being extracted themselves
+    'other': [
+        'summary', 'profile', 'objective', 'about me', 'projects',
+        'certifications', 'certificates', 'awards', 'honors', 'publications',
+        'references', 'interests', 'hobbies', 'volunteering', 'volunteer work',
+        'activities', 'achievements', 'accomplishments', 'contact'
+    ]
+}
+
+# Words that may qualify a header, e.g. "Technical Skills", "Work Experience"
+HEADER_QUALIFIERS = [
+    'technical', 'core', 'key', 'professional', 'work', 'relevant', 'related',
+    'employment', 'career', 'academic', 'educational', 'additional', 'other',
+    'computer', 'programming', 'software', 'selected', 'recent', 'previous'
+]
+
+# Headers (the part before any colon) longer than this are treated as
+# ordinary content lines
+MAX_HEADER_LENGTH = 50
+
+def _compile_header_regex():
+    """Compile one matcher that classifies a line as a section header."""
+    groups = []
+    for section, phrases in SECTION_HEADERS.items():
+        # Longest phrases first so "work history" wins over "work"
+        alternatives = '|'.join(
+            r'\s+'.join(re.escape(word) for word in phrase.split())
+            for phrase in sorted(phrases, key=len, reverse=True)
+        )
+        groups.append(f'(?P<{section}>{alternatives})')
+
+    qualifiers = '|'.join(HEADER_QUALIFIERS)
+    pattern = (
+        r'^[\W_]*'
+        rf'(?:(?:{qualifiers})\s+){{0,2}}'
+        rf'(?:{"|".join(groups)})'
+        r'(?:\s+(?:and|&)\s+\w+(?:\s+\w+)?)?'
+        # Either a bare header line or an inline "Skills: Python, SQL" line
+        r'(?:[\W_]*|\s*:.*)$'
+    )
+    return re.compile(pattern, re.IGNORECASE)
+
+HEADER_REGEX = _compile_header_regex()
+
+def classify_header(line):
+    """Return the section name if the line is a section header, else None."""
+    line = line.strip()
+    if not line or len(line.split(':', 1)[0]) > MAX_HEADER_LENGTH:
+        return None
+
+    match = HEADER_REGEX.match(line)
+    return match.lastgroup if match else None
+
+def segment_sections(lines):
+    """
+    Split resume lines into sections in a single pass.
+
+    Args:
+        lines: The resume text split into lines
+
+    Returns:
+        A dictionary mapping section name to a list of [start, end) line spans.
+        Each span starts at the section's header line.
+    """
+    spans = {}
+    current = None
+    start = 0
+
+    for i, line in enumerate(lines):
+        section = classify_header(line)
+        if section is None:
+            continue
+
+        # Close the open section at the next header
+        if current is not None:
+            spans.setdefault(current, []).append((start, i))
+
+        current = section
+        start = i
+
+    if current is not None:
+        spans.setdefault(current, []).append((start, len(lines)))
+
+    return spans
+
+def get_section(lines, spans, section):
+    """Return the text of every span recorded for a section."""
+    parts = ['\n'.join(lines[start:end]).strip() for start, end in spans.get(section, [])]
+    return '\n'.join(part for part in parts if part)
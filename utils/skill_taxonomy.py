@@ -0,0 +1,169 @@
+import csv
+import os
+import re
+from collections import deque
+from pathlib import Path
+from utils.caching import get_compiled
+
+# Skill taxonomy file: CSV (or tab-separated .tsv/.txt) with one skill per row
+SKILL_TAXONOMY_PATH = Path(os.environ.get("SKILL_TAXONOMY_PATH", "assets/skill_taxonomy.csv"))
+
+# Column names recognised for the skill label, its aliases and its category,
+# covering our own files and ESCO / O*NET exports
+LABEL_COLUMNS = ['skill', 'preferredLabel', 'Example', 'name']
+ALIAS_COLUMNS = ['aliases', 'altLabels']
+CATEGORY_COLUMNS = ['category', 'skillType', 'Commodity Title']
+
+# Separators between aliases in one cell (ESCO uses newlines)
+ALIAS_SEPARATOR_REGEX = re.compile(r'[|\n]')
+
+# Words, keeping the symbols that are part of skill names (c++, c#, node.js, .net)
+TOKEN_REGEX = re.compile(r'[\w+#]+(?:\.[\w+#]+)*|\.\w+')
+
+# (modification time, automaton) per taxonomy file
+_automatons = {}
+
+def tokenize(text):
+    """Split text into lowercase skill tokens."""
+    return TOKEN_REGEX.findall(text.lower())
+
+def _column(fieldnames, candidates):
+    """Return the first of the candidate column names present in a file."""
+    return next((name for name in candidates if name in fieldnames), None)
+
+def load_skill_taxonomy(path=SKILL_TAXONOMY_PATH):
+    """
+    Read a skill taxonomy file.
+
+    Returns:
+        A dictionary mapping each skill's label and aliases (lowercased) to a
+        (skill label, category) tuple
+    """
+    path = Path(path)
+    delimiter = '\t' if path.suffix.lower() in ('.tsv', '.txt') else ','
+    entries = {}
+
+    with open(path, encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f, delimiter=delimiter)
+        fieldnames = reader.fieldnames or []
+        label_column = _column(fieldnames, LABEL_COLUMNS)
+        alias_column = _column(fieldnames, ALIAS_COLUMNS)
+        category_column = _column(fieldnames, CATEGORY_COLUMNS)
+
+        if label_column is None:
+            raise ValueError(f"No skill label column in {path}; expected one of {LABEL_COLUMNS}")
+
+        for row in reader:
+            label = (row.get(label_column) or '').strip()
+            if not label:
+                continue
+            category = (row.get(category_column) or '').strip() if category_column else ''
+
+            terms = [label]
+            if alias_column:
+                terms += ALIAS_SEPARATOR_REGEX.split(row.get(alias_column) or '')
+
+            for term in terms:
+                term = term.strip().lower()
+                if term:
+                    entries.setdefault(term, (label, category))
+
+    return entries
+
+class SkillAutomaton:
+    """
+    Aho-Corasick automaton over skill terms, with whole tokens as symbols.
+
+    Matching on tokens rather than characters gives word-boundary handling
+    for free and keeps the automaton small for tens of thousands of terms.
+    """
+
+    def __init__(self, entries):
+        # Per node: transitions, failure link and (length, skill) outputs
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [()]
+
+        for term, skill in entries.items():
+            tokens = tokenize(term)
+            if not tokens:
+                continue
+
+            node = 0
+            for token in tokens:
+                next_node = self.goto[node].get(token)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][token] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append(())
+                node = next_node
+            if not self.outputs[node]:
+                self.outputs[node] = ((len(tokens), skill),)
+
+        # Breadth-first pass to set failure links and inherit their outputs
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self.goto[node].items():
+                fallback = self.fail[node]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(token, 0)
+                self.outputs[child] += self.outputs[self.fail[child]]
+                queue.append(child)
+
+    def find(self, text):
+        """
+        Find skill terms in text in one pass over its tokens.
+
+        Overlapping matches are resolved leftmost-longest, so "machine
+        learning" is not also counted as "learning".
+
+        Returns:
+            A list of (first token, end token, skill) tuples in text order
+        """
+        goto = self.goto
+        fail = self.fail
+        outputs = self.outputs
+
+        matches = []
+        node = 0
+        for i, token in enumerate(tokenize(text)):
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            for length, skill in outputs[node]:
+                matches.append((i + 1 - length, i + 1, skill))
+
+        matches.sort(key=lambda match: (match[0], -match[1]))
+        selected = []
+        end = 0
+        for match in matches:
+            if match[0] >= end:
+                selected.append(match)
+                end = match[1]
+
+        return selected
+
+def get_skill_automaton(path=SKILL_TAXONOMY_PATH):
+    """Return the automaton for a taxonomy file, rebuilding it if the file changed."""
+    return get_compiled(_automatons, path, lambda path: SkillAutomaton(load_skill_taxonomy(path) if path else {}))
+
+def extract_taxonomy_skills(text, path=SKILL_TAXONOMY_PATH):
+    """
+    Extract a resume's skill profile from the taxonomy.
+
+    Returns:
+        A list of dictionaries with the skill, its category and the number of
+        mentions, in order of first mention
+    """
+    profile = {}
+    for _, _, (skill, category) in get_skill_automaton(path).find(text):
+        if skill in profile:
+            profile[skill]['mentions'] += 1
+        else:
+            profile[skill] = {'skill': skill, 'category': category, 'mentions': 1}
+
+    return list(profile.values())
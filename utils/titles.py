@@ -0,0 +1,101 @@
+import re
+from pathlib import Path
+from utils.caching import get_compiled
+
+# File with one job title per line; the order sets the order of results
+JOB_TITLES_PATH = Path("assets/job_titles.txt")
+
+# Used when the titles file is missing
+DEFAULT_JOB_TITLES = [
+    'engineer', 'developer', 'manager', 'director', 'analyst',
+    'specialist', 'consultant', 'coordinator', 'assistant',
+    'designer', 'architect', 'administrator', 'supervisor',
+    'lead', 'head', 'chief', 'officer', 'president', 'vp',
+    'vice president', 'executive', 'founder', 'co-founder'
+]
+
+CHUNK_REGEX = re.compile(r'\S+')
+WORD_REGEX = re.compile(r'\w+')
+
+# (modification time, title index) per titles file
+_title_indexes = {}
+
+def load_job_titles(path=JOB_TITLES_PATH):
+    """Read job titles from a file, one per line; '#' starts a comment."""
+    titles = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            title = line.split('#', 1)[0].strip().lower()
+            if title and title not in titles:
+                titles.append(title)
+    return titles
+
+def compile_title_index(titles):
+    """
+    Build a word-level trie over job titles.
+
+    Returns:
+        A dictionary mapping a title's first word to (title position, words)
+        tuples for every title starting with that word
+    """
+    index = {}
+    for position, title in enumerate(titles):
+        words = tuple(title.lower().split())
+        index.setdefault(words[0], []).append((position, words))
+    return index
+
+def get_title_index(path=JOB_TITLES_PATH):
+    """Return the compiled index for a titles file, recompiling it if the file changed."""
+    return get_compiled(
+        _title_indexes,
+        path,
+        lambda path: compile_title_index(load_job_titles(path) if path else DEFAULT_JOB_TITLES)
+    )
+
+def find_titles(sentence, title_index):
+    """
+    Find job titles in one sentence in a single pass over its words.
+
+    Each occurrence is widened to the run of plain words around it, so
+    "senior software engineer at" is returned for "engineer". Results are
+    ordered by title position, then by position in the sentence, matching
+    the spans the previous per-title regex returned.
+    """
+    chunks = list(CHUNK_REGEX.finditer(sentence))
+    texts = [chunk.group() for chunk in chunks]
+    plain = [WORD_REGEX.fullmatch(text) is not None for text in texts]
+
+    # Title occurrences as (title position, first chunk, last chunk)
+    occurrences = []
+    for i, text in enumerate(texts):
+        for position, words in title_index.get(text, ()):
+            end = i + len(words)
+            if tuple(texts[i:end]) == words:
+                occurrences.append((position, i, end - 1))
+    occurrences.sort()
+
+    titles = []
+    current = None
+    next_start = 0
+    for position, first, last in occurrences:
+        # Matches of one title never overlap, and a match also uses up the
+        # whitespace after it, so the following word cannot start the next one
+        if position != current:
+            current = position
+            next_start = 0
+        if first < next_start:
+            continue
+
+        # Widen to the neighbouring plain words on both sides
+        while first > next_start and plain[first - 1]:
+            first -= 1
+        while last + 1 < len(chunks) and plain[last + 1]:
+            last += 1
+
+        next_start = last + 1
+        if next_start < len(chunks) and chunks[next_start].start() - chunks[last].end() == 1:
+            next_start += 1
+
+        titles.append(sentence[chunks[first].start():chunks[last].end()])
+
+    return titles
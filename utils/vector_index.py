@@ -0,0 +1,209 @@
+import threading
+import numpy as np
+from utils.db import load_embeddings, load_candidate_embedding
+
+# Above this many vectors an approximate (HNSW) index is built if hnswlib
+# is installed; below it, exact brute-force search is fast enough
+APPROXIMATE_INDEX_THRESHOLD = 100000
+
+# HNSW graph parameters
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+class VectorIndex:
+    """
+    In-memory index over the stored resume embeddings of one encoder and
+    embedding version.
+
+    Vectors are kept in one contiguous float32 matrix for exact search by a
+    single matrix-vector product; large indexes also get an HNSW graph.
+    """
+
+    def __init__(self, model, version):
+        self.model = model
+        self.version = version
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.count = 0
+        self.positions = {}
+        # Resume blob id of each candidate; one resume screened for several
+        # jobs has a row per candidate
+        self.blob_ids = {}
+        self.approximate = None
+        # Largest candidate id loaded from the database
+        self.last_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def add(self, ids, vectors, blob_ids=None):
+        """Add vectors for candidate ids, skipping ids already in the index."""
+        if len(ids) == 0:
+            return
+        if blob_ids is None:
+            blob_ids = [None] * len(ids)
+
+        vectors = np.array(vectors, dtype=np.float32).reshape(len(ids), -1)
+        # Stored vectors are float16, so restore unit length
+        vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+        with self._lock:
+            keep = [i for i, candidate_id in enumerate(ids) if int(candidate_id) not in self.positions]
+            if not keep:
+                return
+            ids = np.asarray(ids, dtype=np.int64)[keep]
+            vectors = vectors[keep]
+
+            needed = self.count + len(ids)
+            if needed > len(self.ids):
+                # Grow geometrically so repeated single adds stay cheap
+                capacity = max(needed, 2 * len(self.ids))
+                matrix = np.zeros((capacity, vectors.shape[1]), dtype=np.float32)
+                if self.count:
+                    matrix[:self.count] = self.matrix[:self.count]
+                self.matrix = matrix
+                self.ids = np.resize(self.ids, capacity)
+
+            self.matrix[self.count:needed] = vectors
+            self.ids[self.count:needed] = ids
+            for offset, candidate_id in enumerate(ids):
+                self.positions[int(candidate_id)] = self.count + offset
+                self.blob_ids[int(candidate_id)] = blob_ids[keep[offset]]
+            self.count = needed
+
+            if self.approximate is not None:
+                if self.approximate.get_max_elements() < needed:
+                    self.approximate.resize_index(max(needed, 2 * self.approximate.get_max_elements()))
+                self.approximate.add_items(vectors, ids)
+            elif self.count > APPROXIMATE_INDEX_THRESHOLD:
+                self._build_approximate()
+
+    def _build_approximate(self):
+        """Build the HNSW graph over every vector; stays exact without hnswlib."""
+        try:
+            import hnswlib
+        except ImportError:
+            return
+
+        graph = hnswlib.Index(space='ip', dim=self.matrix.shape[1])
+        graph.init_index(max_elements=2 * self.count, ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+        graph.add_items(self.matrix[:self.count], self.ids[:self.count])
+        self.approximate = graph
+
+    def vector(self, candidate_id):
+        """Return the indexed vector of a candidate, or None."""
+        position = self.positions.get(int(candidate_id))
+        return None if position is None else self.matrix[position]
+
+    def _nearest(self, query, fetch):
+        """Return the fetch nearest (candidate id, similarity) pairs, best first."""
+        if self.approximate is not None:
+            self.approximate.set_ef(max(HNSW_EF_SEARCH, fetch))
+            labels, distances = self.approximate.knn_query(query, k=fetch)
+            # Inner-product distance is 1 - similarity
+            return list(zip(labels[0], 1 - distances[0]))
+
+        scores = self.matrix[:self.count] @ query
+        top = np.argpartition(-scores, fetch - 1)[:fetch]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return list(zip(self.ids[top], scores[top]))
+
+    def search(self, query, k=10, exclude=(), exclude_blobs=()):
+        """
+        Find the resumes most similar to a query vector.
+
+        A resume screened for several jobs is returned once, as its best
+        scoring candidate row.
+
+        Args:
+            exclude: Candidate ids to leave out
+            exclude_blobs: Resume blob ids to leave out
+
+        Returns:
+            A list of up to k (candidate id, cosine similarity) tuples, best first
+        """
+        if self.count == 0:
+            return []
+
+        query = np.asarray(query, dtype=np.float32)
+        query = query / max(np.linalg.norm(query), 1e-12)
+        exclude = {int(candidate_id) for candidate_id in exclude}
+        exclude_blobs = set(exclude_blobs) - {None}
+        fetch = min(k + len(exclude), self.count)
+
+        while True:
+            results = []
+            seen_blobs = set(exclude_blobs)
+            for candidate_id, score in self._nearest(query, fetch):
+                candidate_id = int(candidate_id)
+                blob_id = self.blob_ids.get(candidate_id)
+                if candidate_id in exclude or blob_id in seen_blobs:
+                    continue
+                if blob_id is not None:
+                    seen_blobs.add(blob_id)
+                results.append((candidate_id, float(score)))
+                if len(results) == k:
+                    return results
+
+            # Duplicates used up the fetched rows, so look further
+            if fetch == self.count:
+                return results
+            fetch = min(2 * fetch, self.count)
+
+# One index per (encoder id, embedding version), loaded on first use
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_vector_index(model, version):
+    """Return the index for an encoder and version, loading any new embeddings."""
+    with _indexes_lock:
+        index = _indexes.get((model, version))
+        if index is None:
+            index = _indexes[(model, version)] = VectorIndex(model, version)
+
+    # Pick up embeddings saved since the last load, e.g. by another process
+    candidate_ids, matrix, blob_ids = load_embeddings(model, version, after_id=index.last_id)
+    if len(candidate_ids):
+        index.add(candidate_ids, matrix, blob_ids)
+        index.last_id = max(index.last_id, int(candidate_ids[-1]))
+
+    return index
+
+def index_candidate_embedding(candidate_id, embedding, resume_blob_id=None):
+    """Add a newly saved candidate's embedding to its index if it is loaded."""
+    index = _indexes.get((embedding['model'], embedding['version']))
+    if index is not None:
+        index.add([candidate_id], [embedding['vector']], [resume_blob_id])
+
+def search_candidates(query_text, k=10):
+    """
+    Find the candidates whose resumes best match a free-text query.
+
+    Returns:
+        A list of up to k (candidate id, cosine similarity) tuples, best first
+    """
+    from utils.nlp import preprocess_text, embed_texts, EMBEDDING_VERSION
+    from utils.models import get_encoder_id
+
+    query = embed_texts([preprocess_text(query_text)])[0]
+    return get_vector_index(get_encoder_id(), EMBEDDING_VERSION).search(query, k)
+
+def more_like_this(candidate_id, k=10):
+    """
+    Find the candidates whose resumes are most similar to a candidate's.
+
+    The candidate's own resume is left out, including where it was screened
+    for other jobs.
+
+    Returns:
+        A list of up to k (candidate id, cosine similarity) tuples, best
+        first, or None if the candidate has no stored embedding
+    """
+    embedding = load_candidate_embedding(candidate_id)
+    if embedding is None:
+        return None
+
+    index = get_vector_index(embedding['model'], embedding['version'])
+    return index.search(embedding['vector'], k, exclude=[candidate_id], exclude_blobs=[embedding['resume_blob_id']])
@@ -1,11 +1,11 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import json
 from sklearn.manifold import TSNE
 import plotly.express as px
 import plotly.graph_objects as go
+from utils.db import load_job_embeddings, get_candidate_skills
 
 def plot_similarity_heatmap(candidates, criteria):
     """Plot a heatmap of candidate-criteria similarity."""
@@ -69,49 +69,35 @@ def plot_similarity_heatmap(candidates, criteria):
 
 def plot_candidate_embeddings(candidates):
     """Plot candidate embeddings in 2D space using t-SNE."""
-    # Extract embeddings
+    if candidates.empty:
+        st.warning("No embedding data available for visualization.")
+        return
+    
+    # Load the stored resume embeddings for the job
+    candidate_ids, matrix = load_job_embeddings(int(candidates['job_id'].iloc[0]))
+    rows = {int(candidate_id): i for i, candidate_id in enumerate(candidate_ids)}
+    
     names = []
     scores = []
     passed = []
-    embeddings = []
+    indices = []
     
     for _, candidate in candidates.iterrows():
-        if candidate['nlp_results']:
-            try:
-                nlp_results = json.loads(candidate['nlp_results'])
-                
-                # We don't actually store the embeddings in the database
-                # This is a placeholder for demonstration
-                # In a real implementation, you would store and retrieve the embeddings
-                
-                # For now, we'll use the criteria similarities as a proxy
-                criteria_matches = nlp_results.get('criteria_matches', [])
-                if criteria_matches:
-                    # Use similarities as a feature vector
-                    embedding = [match['similarity'] for match in criteria_matches]
-                    
-                    # Only use if we have enough dimensions
-                    if len(embedding) >= 3:
-                        names.append(candidate['name'])
-                        scores.append(candidate['score'])
-                        passed.append("Pass" if candidate['passed'] else "Fail")
-                        embeddings.append(embedding)
-            except:
-                pass
+        if int(candidate['id']) in rows:
+            names.append(candidate['name'])
+            scores.append(candidate['score'])
+            passed.append("Pass" if candidate['passed'] else "Fail")
+            indices.append(rows[int(candidate['id'])])
     
-    if not embeddings:
+    if len(indices) < 2:
         st.warning("No embedding data available for visualization.")
         return
     
-    # Pad embeddings to the same length
-    max_length = max(len(emb) for emb in embeddings)
-    padded_embeddings = [emb + [0] * (max_length - len(emb)) for emb in embeddings]
-    
-    # Convert to numpy array
-    embeddings_array = np.array(padded_embeddings)
+    embeddings_array = matrix[indices]
     
     # Apply t-SNE for dimensionality reduction
-    tsne = TSNE(n_components=2, random_state=42)
+    # Perplexity must be smaller than the number of candidates
+    tsne = TSNE(n_components=2, random_state=42, perplexity=min(30, len(indices) - 1))
     embeddings_2d = tsne.fit_transform(embeddings_array)
     
     # Create a DataFrame for plotting
@@ -149,22 +135,30 @@ def plot_candidate_embeddings(candidates):
 
 def plot_skill_distribution(candidates):
     """Plot the distribution of skills across candidates."""
-    # Extract skills
+    # Count candidates per taxonomy skill stored at screening time
     all_skills = {}
     
-    for _, candidate in candidates.iterrows():
-        if candidate['nlp_results']:
-            try:
-                nlp_results = json.loads(candidate['nlp_results'])
-                skills = nlp_results.get('skills_matched', [])
-                
-                for skill in skills:
-                    if skill in all_skills:
-                        all_skills[skill] += 1
-                    else:
-                        all_skills[skill] = 1
-            except:
-                pass
+    if not candidates.empty:
+        skills = get_candidate_skills(int(candidates['job_id'].iloc[0]))
+        skills = skills[skills['candidate_id'].isin(candidates['id'])]
+        all_skills = skills['skill'].value_counts().to_dict()
+    
+    # Candidates screened before skill profiles were stored only have the
+    # criteria they matched
+    if not all_skills:
+        for _, candidate in candidates.iterrows():
+            if candidate['nlp_results']:
+                try:
+                    nlp_results = json.loads(candidate['nlp_results'])
+                    skills = nlp_results.get('skills_matched', [])
+                    
+                    for skill in skills:
+                        if skill in all_skills:
+                            all_skills[skill] += 1
+                        else:
+                            all_skills[skill] = 1
+                except:
+                    pass
     
     if not all_skills:
         st.warning("No skill data available for visualization.")